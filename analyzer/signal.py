@@ -14,7 +14,6 @@ try:
     import redis
 except ImportError:
     redis = None
-import yaml
 
 from analyzer.trend import TrendAnalyzer, TrendResult
 from collector.market_data import MarketDataClient
@@ -42,8 +41,8 @@ class SignalGenerator:
     def __init__(self, redis_client, config: Optional[dict] = None):
         self.redis = redis_client
         if config is None:
-            with open("config/config.yaml", "r") as f:
-                config = yaml.safe_load(f)
+            from utils.config import load_config
+            config = load_config()
         self.config = config
         self.analyzer_cfg = config.get("analyzer", {})
         self.trend = TrendAnalyzer(self.analyzer_cfg)
@@ -167,24 +166,36 @@ class SignalGenerator:
     def run_subscriber(self):
         """
         Redis channel:screened 구독 → 시그널 생성 → channel:signal publish
+        메시지는 drain()으로 배치 수신하고, 배치 내 시그널은 파이프라인 1회로 publish
         """
+        from utils.pubsub import drain
+
         logger.info("📡 시그널 생성기 시작 — channel:screened 구독 중...")
         pubsub = self.redis.pubsub()
         pubsub.subscribe("channel:screened")
 
-        for message in pubsub.listen():
-            if message["type"] != "message":
-                continue
+        while True:
+            signals = []
+            for message in drain(pubsub):
+                try:
+                    data = json.loads(message["data"])
+                    ticker = data.get("ticker")
+                    if not ticker:
+                        continue
 
-            try:
-                data = json.loads(message["data"])
-                ticker = data.get("ticker")
-                if not ticker:
-                    continue
+                    signal = self.evaluate(ticker, data)
+                    if signal and signal["signal"] in (SIGNAL_BUY, SIGNAL_SELL, SIGNAL_STOP):
+                        signals.append(signal)
 
-                signal = self.evaluate(ticker, data)
-                if signal and signal["signal"] in (SIGNAL_BUY, SIGNAL_SELL, SIGNAL_STOP):
-                    self._publish_signal(signal)
+                except Exception as e:
+                    logger.error(f"시그널 생성 오류: {e}", exc_info=True)
 
+            if not signals:
+                continue
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for signal in signals:
+                    pipe.publish("channel:signal", json.dumps(signal))
+                pipe.execute()
             except Exception as e:
-                logger.error(f"시그널 생성 오류: {e}", exc_info=True)
+                logger.warning(f"Redis publish 실패 ({len(signals)}건): {e}")
@@ -62,6 +62,7 @@ class BarScanner(threading.Thread):
         }
 
         self._running = True
+        self._stop_event = threading.Event()  # stop() 시 스캔 간 대기 즉시 중단
 
     def set_candidates(self, candidates: dict[str, float]):
         """스냅샷 스레드가 후보 종목 전달 {ticker: current_price}"""
@@ -209,10 +210,11 @@ class BarScanner(threading.Thread):
                 self._scan()
             except Exception as e:
                 logger.error(f"[BarScanner] 스캔 오류: {e}", exc_info=True)
-            time.sleep(self.scan_interval)
+            self._stop_event.wait(self.scan_interval)
 
     def stop(self):
         self._running = False
+        self._stop_event.set()
 
     def reset_session(self):
         """새 세션 시작 시 초기화"""
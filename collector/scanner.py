@@ -13,19 +13,13 @@ try:
     import redis
 except ImportError:
     redis = None
-import yaml
 
 from collector.market_data import MarketDataClient
+from utils.config import load_config
 
 logger = logging.getLogger(__name__)
 
 
-def load_config() -> dict:
-    """config.yaml 로드"""
-    with open("config/config.yaml", "r") as f:
-        return yaml.safe_load(f)
-
-
 class StockScanner:
     """전종목 스캐너 — 1차 필터링 후 Redis publish"""
 
@@ -301,6 +301,15 @@ class SnapshotScanner:
         snap = self._last_snapshot.get(ticker)
         return snap["price"] if snap else None
 
+    def get_prices(self, tickers) -> dict[str, Optional[float]]:
+        """여러 종목 가격을 스냅샷 1회 참조로 조회 (없는 종목은 None)"""
+        snapshot = self._last_snapshot
+        prices = {}
+        for t in tickers:
+            snap = snapshot.get(t)
+            prices[t] = snap["price"] if snap else None
+        return prices
+
     def get_all_prices(self) -> dict[str, float]:
         return {t: s["price"] for t, s in self._last_snapshot.items() if s["price"] > 0}
 
@@ -87,6 +87,7 @@ CREATE TABLE positions (
   max_drawdown DECIMAL(8,4),
   max_profit DECIMAL(8,4),
   entry_indicators JSONB,
+  entry_indicators_vec BYTEA,  -- INDICATOR_KEYS 순서 float32 packed
   exit_indicators JSONB,
   market_context_entry INT REFERENCES market_contexts(id),
   market_context_exit INT REFERENCES market_contexts(id),
@@ -135,7 +136,11 @@ CREATE TABLE daily_reports (
 -- 인덱스
 CREATE INDEX idx_signals_ticker ON signals(ticker);
 CREATE INDEX idx_signals_created ON signals(created_at);
+CREATE INDEX idx_signals_ticker_created ON signals(ticker, created_at);
 CREATE INDEX idx_trades_position ON trades(position_id);
 CREATE INDEX idx_positions_status ON positions(status);
 CREATE INDEX idx_positions_ticker ON positions(ticker);
+CREATE INDEX idx_positions_status_closed ON positions(status, closed_at DESC);
+CREATE INDEX idx_positions_status_pnl ON positions(status, pnl);
+CREATE INDEX idx_positions_ticker_status ON positions(ticker, status) INCLUDE (pnl, pnl_pct, holding_minutes);
 CREATE INDEX idx_patterns_active ON patterns(is_active);
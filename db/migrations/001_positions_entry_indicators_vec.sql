@@ -0,0 +1,3 @@
+-- 기존 DB용: init.sql은 최초 기동 시에만 실행되므로 컬럼을 별도로 추가
+-- psql -U stockbot -d stockbot -f db/migrations/001_positions_entry_indicators_vec.sql
+ALTER TABLE positions ADD COLUMN IF NOT EXISTS entry_indicators_vec BYTEA;  -- INDICATOR_KEYS 순서 float32 packed
@@ -0,0 +1,60 @@
+"""
+패턴 마이닝 수치 커널
+- numba 설치 시 JIT(병렬) 버전, 없으면 동일 결과의 NumPy 버전
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+def _scan_ranges_numpy(X, wins, pnl_pct, lo, hi):
+    in_range = (X >= lo) & (X <= hi)
+    win_in_range = in_range & wins[:, None]
+    ret_sum = (win_in_range * pnl_pct[:, None]).sum(axis=0)
+    return win_in_range.sum(axis=0), in_range.sum(axis=0), ret_sum
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True, nogil=True)
+    def _scan_ranges_jit(X, wins, pnl_pct, lo, hi):
+        n, k_dim = X.shape
+        out_wins = np.zeros(k_dim, np.int64)
+        out_total = np.zeros(k_dim, np.int64)
+        out_ret = np.zeros(k_dim, np.float64)
+        # 지표(열) 단위 병렬 — 비교/AND/합계를 한 루프에 융합
+        for k in prange(k_dim):
+            w = 0
+            t = 0
+            r = 0.0
+            for i in range(n):
+                v = X[i, k]
+                if lo[k] <= v <= hi[k]:
+                    t += 1
+                    if wins[i]:
+                        w += 1
+                        r += pnl_pct[i]
+            out_wins[k] = w
+            out_total[k] = t
+            out_ret[k] = r
+        return out_wins, out_total, out_ret
+
+
+def scan_ranges(X: np.ndarray, wins: np.ndarray, pnl_pct: np.ndarray,
+                lo: np.ndarray, hi: np.ndarray) -> tuple:
+    """
+    지표별 [lo, hi] 구간 집계
+
+    Returns: (구간 내 승리 수, 구간 내 전체 수, 구간 내 승리 수익률 합) — 각 (K,)
+    """
+    if njit is None:
+        return _scan_ranges_numpy(X, wins, pnl_pct, lo, hi)
+    return _scan_ranges_jit(
+        np.ascontiguousarray(X, dtype=np.float64),
+        np.ascontiguousarray(wins, dtype=np.bool_),
+        np.ascontiguousarray(pnl_pct, dtype=np.float64),
+        np.ascontiguousarray(lo, dtype=np.float64),
+        np.ascontiguousarray(hi, dtype=np.float64),
+    )
@@ -3,17 +3,36 @@
 - 시그널/마켓 데이터에서 ML 피처 추출
 - 정규화, NaN 처리
 """
+from types import MappingProxyType
+
 import numpy as np
 from typing import Dict, List, Optional
 
-FEATURE_NAMES = [
+FEATURE_NAMES = (
     "rsi",
     "macd_histogram",
     "ema_ratio",        # EMA5 / EMA20
     "bollinger_pos",    # (price - lower) / (upper - lower)
     "volume_ratio",     # volume / avg_volume_20
     "volatility",       # (high - low) / close
-]
+)
+
+# 입력 키 → 허용 별칭 (우선순위 순). pandas-ta 컬럼명 포함
+ALIASES = MappingProxyType({
+    "rsi": ("rsi", "RSI"),
+    "macd_histogram": ("macd_histogram", "MACD_histogram", "MACDh_12_26_9"),
+    "ema5": ("ema5", "EMA_5"),
+    "ema20": ("ema20", "EMA_20"),
+    "bb_upper": ("bb_upper", "BBU_20_2.0"),
+    "bb_lower": ("bb_lower", "BBL_20_2.0"),
+    "close": ("close", "price"),
+    "avg_volume": ("avg_volume_20", "volume_sma_20"),
+})
+
+
+def _pick(data: Dict, key: str):
+    """ALIASES 순서대로 첫 번째로 존재하는 키의 값 (없으면 None)"""
+    return next((data[k] for k in ALIASES[key] if k in data), None)
 
 
 def extract_features(signal_data: Dict) -> Optional[np.ndarray]:
@@ -30,25 +49,25 @@ def extract_features(signal_data: Dict) -> Optional[np.ndarray]:
         features = []
         
         # RSI (0-100 → 0-1)
-        rsi = signal_data.get("rsi", signal_data.get("RSI"))
+        rsi = _pick(signal_data, "rsi")
         features.append(_normalize(rsi, 0, 100))
         
         # MACD Histogram (보통 -2 ~ +2 범위, tanh로 정규화)
-        macd_hist = signal_data.get("macd_histogram", signal_data.get("MACD_histogram", signal_data.get("MACDh_12_26_9")))
+        macd_hist = _pick(signal_data, "macd_histogram")
         features.append(_tanh_normalize(macd_hist))
         
         # EMA5/EMA20 비율
-        ema5 = signal_data.get("ema5", signal_data.get("EMA_5"))
-        ema20 = signal_data.get("ema20", signal_data.get("EMA_20"))
+        ema5 = _pick(signal_data, "ema5")
+        ema20 = _pick(signal_data, "ema20")
         if ema5 is not None and ema20 is not None and ema20 != 0:
             features.append((ema5 / ema20) - 1.0)  # 0 중심
         else:
             features.append(0.0)
         
         # 볼린저 밴드 위치 (0-1)
-        bb_upper = signal_data.get("bb_upper", signal_data.get("BBU_20_2.0"))
-        bb_lower = signal_data.get("bb_lower", signal_data.get("BBL_20_2.0"))
-        price = signal_data.get("close", signal_data.get("price"))
+        bb_upper = _pick(signal_data, "bb_upper")
+        bb_lower = _pick(signal_data, "bb_lower")
+        price = _pick(signal_data, "close")
         if all(v is not None for v in [bb_upper, bb_lower, price]) and bb_upper != bb_lower:
             features.append((price - bb_lower) / (bb_upper - bb_lower))
         else:
@@ -56,7 +75,7 @@ def extract_features(signal_data: Dict) -> Optional[np.ndarray]:
         
         # 거래량 비율
         volume = signal_data.get("volume")
-        avg_volume = signal_data.get("avg_volume_20", signal_data.get("volume_sma_20"))
+        avg_volume = _pick(signal_data, "avg_volume")
         if volume is not None and avg_volume is not None and avg_volume > 0:
             features.append(min(volume / avg_volume, 5.0) / 5.0)  # cap at 5x, normalize
         else:
@@ -65,7 +84,7 @@ def extract_features(signal_data: Dict) -> Optional[np.ndarray]:
         # 변동률
         high = signal_data.get("high")
         low = signal_data.get("low")
-        close = signal_data.get("close", signal_data.get("price"))
+        close = price
         if all(v is not None for v in [high, low, close]) and close > 0:
             features.append((high - low) / close)
         else:
@@ -80,6 +99,58 @@ def extract_features(signal_data: Dict) -> Optional[np.ndarray]:
         return None
 
 
+def extract_features_batch(rows: List[Dict]) -> np.ndarray:
+    """
+    extract_features의 배치 버전 — 분기 없이 NumPy 마스크 연산으로 일괄 계산.
+    
+    Args:
+        rows: 시그널/마켓 데이터 dict 목록
+        
+    Returns:
+        numpy array of shape (len(rows), len(FEATURE_NAMES)), float32
+    """
+    n = len(rows)
+    out = np.empty((n, len(FEATURE_NAMES)), dtype=np.float32)
+    if n == 0:
+        return out
+    
+    def col(key):
+        # None/누락 → NaN
+        if key in ALIASES:
+            return np.array([_pick(d, key) for d in rows], dtype=np.float64)
+        return np.array([d.get(key) for d in rows], dtype=np.float64)
+    
+    rsi = col("rsi")
+    macd_hist = col("macd_histogram")
+    ema5, ema20 = col("ema5"), col("ema20")
+    bb_upper, bb_lower, price = col("bb_upper"), col("bb_lower"), col("close")
+    volume, avg_volume = col("volume"), col("avg_volume")
+    high, low = col("high"), col("low")
+    
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # RSI (0-100 → 0-1)
+        out[:, 0] = np.where(np.isnan(rsi), 0.5, np.clip(rsi / 100.0, 0.0, 1.0))
+        # MACD Histogram (tanh)
+        out[:, 1] = np.where(np.isnan(macd_hist), 0.0, np.tanh(macd_hist))
+        # EMA5/EMA20 비율 (내부 where로 0 나눗셈 회피)
+        ok = ~np.isnan(ema5) & ~np.isnan(ema20) & (ema20 != 0)
+        out[:, 2] = np.where(ok, ema5 / np.where(ok, ema20, 1.0) - 1.0, 0.0)
+        # 볼린저 밴드 위치
+        width = bb_upper - bb_lower
+        ok = ~np.isnan(width) & ~np.isnan(price) & (width != 0)
+        out[:, 3] = np.where(ok, (price - bb_lower) / np.where(ok, width, 1.0), 0.5)
+        # 거래량 비율 (cap 5x)
+        ok = ~np.isnan(volume) & (avg_volume > 0)
+        out[:, 4] = np.where(ok, np.minimum(volume / np.where(ok, avg_volume, 1.0), 5.0) / 5.0, 0.2)
+        # 변동률
+        ok = ~np.isnan(high) & ~np.isnan(low) & (price > 0)
+        out[:, 5] = np.where(ok, (high - low) / np.where(ok, price, 1.0), 0.0)
+    
+    # NaN → 0
+    np.nan_to_num(out, copy=False, nan=0.0, posinf=1.0, neginf=-1.0)
+    return out
+
+
 def _normalize(value, min_val, max_val):
     """Min-max 정규화"""
     if value is None:
@@ -95,4 +166,4 @@ def _tanh_normalize(value, scale=1.0):
 
 
 def get_feature_names() -> List[str]:
-    return FEATURE_NAMES.copy()
+    return list(FEATURE_NAMES)
@@ -3,6 +3,7 @@
 - JSON 파일로 매매 기록, 포지션, 시그널 저장
 - DB 연결 성공 시 DB 사용, 실패 시 파일 fallback
 """
+import copy
 import json
 import os
 import logging
@@ -10,41 +11,105 @@ from datetime import datetime
 from typing import Optional
 import pytz
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 
+if orjson:
+    _ORJSON_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
 
 def _ensure_dir():
     os.makedirs(DATA_DIR, exist_ok=True)
 
 
-def _load(filename: str) -> list:
+# 파싱 결과 캐시 — path → ((mtime_ns, size), records, ticker 인덱스)
+# 파일 stat이 바뀌지 않았으면 재파싱 없이 재사용 (TTL 없음)
+_FILE_CACHE: dict = {}
+
+
+def _index_by_ticker(records: list) -> dict:
+    index: dict = {}
+    for r in records:
+        index.setdefault(r.get("ticker"), []).append(r)
+    return index
+
+
+def _remember(path: str, records: list) -> dict:
+    index = _index_by_ticker(records)
+    try:
+        st = os.stat(path)
+    except OSError:
+        _FILE_CACHE.pop(path, None)
+        return index
+    _FILE_CACHE[path] = ((st.st_mtime_ns, st.st_size), records, index)
+    return index
+
+
+def _load_cached(filename: str) -> tuple:
+    """(records, ticker 인덱스) 반환 — 캐시 공유 객체이므로 외부 반환 시 _copy_records 사용"""
     _ensure_dir()
     path = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(path):
-        return []
     try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return []
+        st = os.stat(path)
+    except OSError:
+        return [], {}
+    cached = _FILE_CACHE.get(path)
+    if cached and cached[0] == (st.st_mtime_ns, st.st_size):
+        return cached[1], cached[2]
+    try:
+        with open(path, "rb") as f:
+            records = _parse(f.read())
+    except (ValueError, IOError):
+        return [], {}
+    return records, _remember(path, records)
+
+
+def _parse(raw: bytes) -> list:
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def _copy_records(records: list) -> list:
+    """캐시된 레코드의 사본 — 호출측 변경이 캐시에 새지 않도록"""
+    return copy.deepcopy(records)
+
+
+def _load(filename: str) -> list:
+    records, _ = _load_cached(filename)
+    return _copy_records(records)
 
 
 def _save(filename: str, data: list):
     _ensure_dir()
     path = os.path.join(DATA_DIR, filename)
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2, default=str)
+    if orjson:
+        # C 확장 인코더 — numpy/datetime 직접 직렬화
+        raw = orjson.dumps(data, default=str, option=_ORJSON_OPTS)
+    else:
+        raw = json.dumps(data, indent=2, default=str).encode()
+    with open(path, "wb") as f:
+        f.write(raw)
+    # 방금 쓴 바이트를 다시 파싱해 캐시 갱신 — 호출측 객체와 분리, 디스크 내용과 동일
+    _remember(path, _parse(raw))
+
+
+_ET = pytz.timezone("America/New_York")
+_KST = pytz.timezone("Asia/Seoul")
 
 
 def _add_timestamps(record: dict):
     """UTC, ET, KST 타임스탬프를 레코드에 추가"""
     utc_now = datetime.now(pytz.utc)
-    record["timestamp_utc"] = utc_now.isoformat()
-    record["timestamp_et"] = utc_now.astimezone(pytz.timezone("America/New_York")).isoformat()
-    record["timestamp_kst"] = utc_now.astimezone(pytz.timezone("Asia/Seoul")).isoformat()
-    record.setdefault("timestamp", utc_now.isoformat())
+    utc_iso = utc_now.isoformat()
+    record["timestamp_utc"] = utc_iso
+    record["timestamp_et"] = utc_now.astimezone(_ET).isoformat()
+    record["timestamp_kst"] = utc_now.astimezone(_KST).isoformat()
+    record.setdefault("timestamp", utc_iso)
 
 
 class FileStore:
@@ -58,10 +123,10 @@ class FileStore:
         logger.debug(f"Trade saved: {trade.get('ticker')}")
 
     def get_trades(self, ticker: Optional[str] = None) -> list:
-        trades = _load("trades.json")
+        trades, by_ticker = _load_cached("trades.json")
         if ticker:
-            return [t for t in trades if t.get("ticker") == ticker]
-        return trades
+            return _copy_records(by_ticker.get(ticker, []))
+        return _copy_records(trades)
 
     def save_position(self, position: dict):
         position.setdefault("updated_at", datetime.now().isoformat())
@@ -89,7 +154,7 @@ class FileStore:
         _save("signals.json", signals)
 
     def get_signals(self, ticker: Optional[str] = None) -> list:
-        signals = _load("signals.json")
+        signals, by_ticker = _load_cached("signals.json")
         if ticker:
-            return [s for s in signals if s.get("ticker") == ticker]
-        return signals
+            return _copy_records(by_ticker.get(ticker, []))
+        return _copy_records(signals)
@@ -12,10 +12,13 @@ import logging
 from datetime import datetime
 from typing import Optional
 
+import numpy as np
+
 try:
     import redis
 except ImportError:
     redis = None
+from sqlalchemy import Float, and_
 from sqlalchemy.orm import Session
 
 from knowledge.models import (
@@ -32,6 +35,15 @@ DEFAULT_WEIGHTS = {
     "volume": 0.30,
 }
 
+# entry_indicators 키 → 누락 시 기본값 (_indicator_bullish_mask 입력)
+INDICATOR_DEFAULTS = {
+    "ema_5": 0.0,
+    "ema_20": 0.0,
+    "macd_histogram": 0.0,
+    "rsi_14": 50.0,
+    "volume_ratio": 0.0,
+}
+
 
 class Learner:
     """자기학습 엔진 — 매매 결과 피드백으로 전략 최적화"""
@@ -121,31 +133,49 @@ class Learner:
         최근 N건 매매 결과 기반으로 지표 가중치 자동 조정
         각 지표의 예측 정확도에 비례하여 가중치 재배분
         """
-        closed = db.query(Position).filter(
+        # JSONB 전체 대신 필요한 지표 스칼라만 서버에서 추출 (->> + ::float)
+        indicator_cols = [
+            Position.entry_indicators[key].astext.cast(Float).label(key)
+            for key in INDICATOR_DEFAULTS
+        ]
+        has_indicators = and_(
+            Position.entry_indicators.isnot(None),
+            Position.entry_indicators != {},
+        ).label("has_indicators")
+        query = db.query(Position.pnl, has_indicators, *indicator_cols).filter(
             Position.status == "CLOSED"
-        ).order_by(Position.closed_at.desc()).limit(lookback).all()
-
-        if len(closed) < 20:
-            logger.info(f"학습 데이터 부족 ({len(closed)}건) — 가중치 조정 스킵")
+        ).order_by(Position.closed_at.desc()).limit(lookback).yield_per(200)
+
+        # 결과를 스트리밍하며 미리 할당한 배열에 바로 채움 (ORM 객체/중간 리스트 없음)
+        pnl = np.empty(lookback, dtype=np.float64)
+        has_ind = np.empty(lookback, dtype=bool)
+        matrix = np.empty((lookback, len(INDICATOR_DEFAULTS)), dtype=np.float64)
+        n = 0
+        for row in query:
+            pnl[n] = row.pnl  # NULL → NaN
+            has_ind[n] = bool(row.has_indicators)
+            matrix[n] = row[2:]
+            n += 1
+        pnl, has_ind, matrix = pnl[:n], has_ind[:n], matrix[:n]
+
+        if n < 20:
+            logger.info(f"학습 데이터 부족 ({n}건) — 가중치 조정 스킵")
             return DEFAULT_WEIGHTS
 
+        # 지표 데이터가 있는 포지션만 → 지표별 NumPy 배열
+        arrays = self._indicator_arrays(matrix[has_ind])
+        win = pnl[has_ind] > 0  # NaN 비교는 False → 손실 취급
+        n_ind = int(has_ind.sum())
+
         # 각 지표별 정확도 계산
+        # 지표가 상승을 가리켰고 실제로 수익 / 하락을 가리켰고 실제로 손실 → 정확
         indicator_accuracy = {}
         for indicator in DEFAULT_WEIGHTS.keys():
-            correct = 0
-            total = 0
-            for pos in closed:
-                indicators = pos.entry_indicators or {}
-                if not indicators:
-                    continue
-                total += 1
-                # 지표가 상승을 가리켰고 실제로 수익 → 정확
-                if self._indicator_was_bullish(indicator, indicators) and pos.pnl > 0:
-                    correct += 1
-                elif not self._indicator_was_bullish(indicator, indicators) and pos.pnl <= 0:
-                    correct += 1
-
-            indicator_accuracy[indicator] = correct / total if total > 0 else 0.25
+            if n_ind == 0:
+                indicator_accuracy[indicator] = 0.25
+                continue
+            bullish = self._indicator_bullish_mask(indicator, arrays)
+            indicator_accuracy[indicator] = float(np.mean(bullish == win))
 
         # 정확도 비례 가중치 재배분
         total_acc = sum(indicator_accuracy.values())
@@ -157,8 +187,8 @@ class Learner:
         # DB에 가중치 이력 저장
         wh = WeightHistory(
             weights=new_weights,
-            performance_score=sum(1 for p in closed if p.pnl and p.pnl > 0) / len(closed),
-            sample_size=len(closed),
+            performance_score=float(np.mean(pnl > 0)),
+            sample_size=n,
         )
         db.add(wh)
         db.commit()
@@ -170,18 +200,27 @@ class Learner:
         logger.info(f"🔄 가중치 업데이트: {new_weights}")
         return new_weights
 
-    def _indicator_was_bullish(self, indicator: str, indicators: dict) -> bool:
-        """지표가 상승을 가리키고 있었는지 판단"""
+    @staticmethod
+    def _indicator_arrays(matrix: np.ndarray) -> dict:
+        """(N, len(INDICATOR_DEFAULTS)) 행렬 → {키: float64 배열} (NaN은 기본값)"""
+        return {
+            key: np.nan_to_num(matrix[:, i], nan=default)
+            for i, (key, default) in enumerate(INDICATOR_DEFAULTS.items())
+        }
+
+    @staticmethod
+    def _indicator_bullish_mask(indicator: str, arrays: dict) -> np.ndarray:
+        """지표가 상승을 가리키고 있었는지 — 포지션 전체에 대한 bool 마스크"""
         if indicator == "ema_cross":
-            return indicators.get("ema_5", 0) > indicators.get("ema_20", 0)
+            return arrays["ema_5"] > arrays["ema_20"]
         elif indicator == "macd":
-            return indicators.get("macd_histogram", 0) > 0
+            return arrays["macd_histogram"] > 0
         elif indicator == "rsi":
-            rsi = indicators.get("rsi_14", 50)
-            return 30 < rsi < 70  # 적정 범위
+            rsi = arrays["rsi_14"]
+            return (rsi > 30) & (rsi < 70)  # 적정 범위
         elif indicator == "volume":
-            return indicators.get("volume_ratio", 0) > 200
-        return False
+            return arrays["volume_ratio"] > 200
+        return np.zeros(len(arrays["rsi_14"]), dtype=bool)
 
     # ─── 지정가 전환 판단 ─────────────────────────────────
     def should_use_limit_orders(self) -> bool:
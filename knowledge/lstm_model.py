@@ -24,6 +24,9 @@ class LSTMPredictor:
     def __init__(self):
         self.model = None
         self.scaler = None
+        # predict용 z-score 파라미터 (sklearn transform 우회)
+        self._mean = None
+        self._std = None
         self.is_trained = False
         self._load_model()
     
@@ -45,43 +48,48 @@ class LSTMPredictor:
         try:
             import torch
             import torch.nn as nn
-            from torch.utils.data import DataLoader, TensorDataset
             from sklearn.preprocessing import StandardScaler
             
-            # 정규화
+            # 정규화 — 호출마다 전달된 data 전체로 재적합
+            # (data 앞부분이 이전 호출과 같다는 보장이 없음)
             self.scaler = StandardScaler()
-            scaled = self.scaler.fit_transform(data)
+            self.scaler.fit(data)
+            scaled = self.scaler.transform(data).astype(np.float32, copy=False)
             
-            # 시퀀스 생성
-            X, y = [], []
-            for i in range(SEQ_LENGTH, len(scaled) - 1):
-                X.append(scaled[i - SEQ_LENGTH:i])
-                # 내일 종가(idx=3)가 오늘보다 높으면 1
-                y.append(1 if data[i + 1, 3] > data[i, 3] else 0)
-            
-            X = np.array(X, dtype=np.float32)
-            y = np.array(y, dtype=np.float32)
+            # 시퀀스 생성 — 슬라이딩 윈도우를 미리 할당된 배열로 1회 복사
+            n_seq = len(scaled) - 1 - SEQ_LENGTH
+            windows = np.lib.stride_tricks.sliding_window_view(scaled, SEQ_LENGTH, axis=0)
+            X = np.empty((n_seq, SEQ_LENGTH, N_FEATURES), dtype=np.float32)
+            X[:] = windows[:n_seq].transpose(0, 2, 1)
+            # 내일 종가(idx=3)가 오늘보다 높으면 1
+            y = (data[SEQ_LENGTH + 1:, 3] > data[SEQ_LENGTH:-1, 3]).astype(np.float32)
             
             # Train/test split
             split = int(len(X) * 0.8)
             X_train, X_test = X[:split], X[split:]
             y_train, y_test = y[:split], y[split:]
             
-            train_ds = TensorDataset(torch.from_numpy(X_train), torch.from_numpy(y_train))
-            train_loader = DataLoader(train_ds, batch_size=32, shuffle=True)
+            # 전체 데이터셋이 작으므로 텐서 1회 변환 후 인덱스 슬라이싱 (DataLoader 오버헤드 제거)
+            X_t = torch.from_numpy(np.ascontiguousarray(X_train))
+            y_t = torch.from_numpy(np.ascontiguousarray(y_train))
+            n_train = len(X_t)
+            batch_size = 32
             
             # 모델 생성
             model = _LSTMNet(N_FEATURES)
-            criterion = nn.BCELoss()
+            # Sigmoid + BCE 융합 (log-sum-exp) — 모델 출력은 logit
+            criterion = nn.BCEWithLogitsLoss()
             optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
             
             # 훈련
             model.train()
             for epoch in range(20):
                 total_loss = 0
-                for xb, yb in train_loader:
-                    pred = model(xb).squeeze()
-                    loss = criterion(pred, yb)
+                perm = torch.randperm(n_train)
+                for i in range(0, n_train, batch_size):
+                    idx = perm[i:i + batch_size]
+                    pred = model(X_t[idx]).squeeze(-1)
+                    loss = criterion(pred, y_t[idx])
                     optimizer.zero_grad()
                     loss.backward()
                     optimizer.step()
@@ -93,9 +101,10 @@ class LSTMPredictor:
                 test_pred = model(torch.from_numpy(X_test)).squeeze()
                 test_labels = torch.from_numpy(y_test)
                 test_loss = criterion(test_pred, test_labels).item()
-                accuracy = float(((test_pred > 0.5).float() == test_labels).float().mean())
+                accuracy = float(((test_pred > 0.0).float() == test_labels).float().mean())
             
             self.model = model
+            self._set_zscore_params()
             self.is_trained = True
             self._save_model()
             
@@ -122,18 +131,19 @@ class LSTMPredictor:
         Returns:
             confidence 0-100 (상승 확률), or None
         """
-        if not self.is_trained or self.model is None or self.scaler is None:
+        if not self.is_trained or self.model is None or self._mean is None:
             return None
         
         try:
             import torch
             
-            scaled = self.scaler.transform(sequence)
-            x = torch.from_numpy(scaled.astype(np.float32)).unsqueeze(0)
+            # (30, 9) 입력에 sklearn 검증/float64 복사는 과함 — NumPy z-score 직접 계산
+            scaled = (np.asarray(sequence, dtype=np.float32) - self._mean) / self._std
+            x = torch.from_numpy(scaled).unsqueeze(0)
             
             self.model.eval()
             with torch.no_grad():
-                prob = self.model(x).squeeze().item()
+                prob = torch.sigmoid(self.model(x)).squeeze().item()
             
             return float(prob) * 100
             
@@ -141,6 +151,11 @@ class LSTMPredictor:
             logger.error(f"LSTM 예측 실패: {e}")
             return None
     
+    def _set_zscore_params(self):
+        """fit된 scaler에서 float32 mean/std 추출 (std=0 → 1)"""
+        self._mean = self.scaler.mean_.astype(np.float32)
+        self._std = np.where(self.scaler.scale_ == 0, 1.0, self.scaler.scale_).astype(np.float32)
+    
     def _save_model(self):
         try:
             import torch
@@ -148,6 +163,8 @@ class LSTMPredictor:
             state = {
                 "model_state": self.model.state_dict(),
                 "scaler": self.scaler,
+                "mean": self._mean,
+                "std": self._std,
             }
             torch.save(state, MODEL_PATH)
             logger.info(f"LSTM 모델 저장: {MODEL_PATH}")
@@ -162,6 +179,10 @@ class LSTMPredictor:
                 self.model = _LSTMNet(N_FEATURES)
                 self.model.load_state_dict(state["model_state"])
                 self.scaler = state["scaler"]
+                if state.get("mean") is not None:
+                    self._mean, self._std = state["mean"], state["std"]
+                else:
+                    self._set_zscore_params()
                 self.is_trained = True
                 logger.info("LSTM 모델 로드 완료")
         except Exception as e:
@@ -181,8 +202,7 @@ class _LSTMNet:
                     nn.Linear(64, 32),
                     nn.ReLU(),
                     nn.Dropout(0.2),
-                    nn.Linear(32, 1),
-                    nn.Sigmoid(),
+                    nn.Linear(32, 1),  # logit (sigmoid는 BCEWithLogitsLoss/predict에서 적용)
                 )
             
             def forward(self, x):
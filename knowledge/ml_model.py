@@ -43,6 +43,10 @@ class XGBoostPredictor:
             from sklearn.model_selection import train_test_split
             from sklearn.metrics import accuracy_score, f1_score
             
+            # XGBoost 내부 DMatrix 변환 시 재복사 방지 — C-contiguous float32로 1회 변환
+            features = np.ascontiguousarray(features, dtype=np.float32)
+            labels = np.ascontiguousarray(labels, dtype=np.float32)
+            
             X_train, X_test, y_train, y_test = train_test_split(
                 features, labels, test_size=0.2, random_state=42, stratify=labels
             )
@@ -53,6 +57,9 @@ class XGBoostPredictor:
                 learning_rate=0.1,
                 use_label_encoder=False,
                 eval_metric="logloss",
+                tree_method="hist",
+                n_jobs=-1,
+                enable_categorical=False,
                 random_state=42,
             )
             self.model.fit(X_train, y_train)
@@ -91,7 +98,7 @@ class XGBoostPredictor:
             if features.ndim == 1:
                 features = features.reshape(1, -1)
             
-            proba = self.model.predict_proba(features)[0]
+            proba = self.model.predict_proba(np.ascontiguousarray(features, dtype=np.float32))[0]
             # proba[1] = win 확률
             confidence = float(proba[1]) * 100
             return confidence
@@ -10,6 +10,7 @@ from typing import Optional
 import numpy as np
 from sqlalchemy.orm import Session
 
+from knowledge._pattern_kernels import scan_ranges
 from knowledge.models import Position, Pattern
 
 logger = logging.getLogger(__name__)
@@ -22,6 +23,15 @@ INDICATOR_KEYS = [
 ]
 
 
+def pack_indicators(indicators: dict) -> bytes:
+    """
+    진입 지표 dict → Position.entry_indicators_vec 용 float32 blob
+    (INDICATOR_KEYS 고정 순서, 누락 키는 0)
+    """
+    vec = np.array([indicators.get(k, 0.0) or 0.0 for k in INDICATOR_KEYS], dtype=np.float32)
+    return vec.tobytes()
+
+
 class PatternMiner:
     """성공 매매 패턴 자동 발견기"""
 
@@ -34,143 +44,186 @@ class PatternMiner:
         닫힌 포지션 분석 → 새 패턴 발견
         Returns: 새로 생성된 패턴 목록
         """
-        closed = db.query(Position).filter(Position.status == "CLOSED").all()
-        if len(closed) < self.min_sample:
-            logger.info(f"데이터 부족 ({len(closed)}건) — 패턴 마이닝 스킵")
+        # 필요한 컬럼만 projection + 승/패 판정 불가 행은 서버에서 제외
+        # (pnl=0/NULL 또는 지표 없는 포지션 — 승/패 어느 쪽도 아님)
+        rows = db.query(
+            Position.entry_indicators_vec, Position.entry_indicators,
+            Position.pnl, Position.pnl_pct,
+        ).filter(
+            Position.status == "CLOSED",
+            Position.pnl.isnot(None),
+            Position.pnl != 0,
+            Position.entry_indicators.isnot(None),
+            Position.entry_indicators != {},
+        ).all()
+        if len(rows) < self.min_sample:
+            logger.info(f"데이터 부족 ({len(rows)}건) — 패턴 마이닝 스킵")
             return []
 
-        winners = [p for p in closed if p.pnl and p.pnl > 0 and p.entry_indicators]
-        losers = [p for p in closed if p.pnl and p.pnl <= 0 and p.entry_indicators]
-
-        if len(winners) < self.min_sample:
-            logger.info(f"성공 매매 부족 ({len(winners)}건)")
+        # SoA: 지표 행렬 X (N×K) + 승패 마스크 + 수익률 벡터
+        # packed blob 있으면 frombuffer, 없는 (구) 행만 dict 파싱
+        K = len(INDICATOR_KEYS)
+        X = np.empty((len(rows), K), dtype=np.float64)
+        for i, r in enumerate(rows):
+            vec = r.entry_indicators_vec
+            if vec is not None and len(vec) == K * 4:
+                X[i] = np.frombuffer(vec, dtype=np.float32)
+            else:
+                X[i] = [r.entry_indicators.get(k, 0) for k in INDICATOR_KEYS]
+        X = np.nan_to_num(X, nan=0.0)
+        wins = np.array([r.pnl > 0 for r in rows], dtype=bool)
+        pnl_pct = np.array([r.pnl_pct or 0.0 for r in rows], dtype=np.float64)
+
+        n_wins = int(wins.sum())
+        if n_wins < self.min_sample:
+            logger.info(f"성공 매매 부족 ({n_wins}건)")
             return []
 
         # 지표별 성공/실패 분포 분석
         new_patterns = []
-        conditions_sets = self._find_winning_conditions(winners, losers)
+        conditions_sets = self._find_winning_conditions(X, wins, pnl_pct)
+
+        # 기존 패턴 (id, 조건)만 1회 조회 → 정규화된 조건 키로 dict 조회 (후보별 SELECT 제거)
+        existing_map = {
+            self._canon(conditions): pattern_id
+            for pattern_id, conditions in db.query(Pattern.id, Pattern.conditions).all()
+        }
+        new_rows, update_rows = [], []
+        now = datetime.utcnow()
 
         for conditions, stats in conditions_sets:
             if stats["sample"] >= self.min_sample and stats["win_rate"] >= self.min_win_rate:
                 # 기존 패턴과 중복 체크
-                existing = db.query(Pattern).filter(Pattern.conditions == conditions).first()
-                if existing:
+                existing_id = existing_map.get(self._canon(conditions))
+                if existing_id is not None:
                     # 기존 패턴 업데이트
-                    existing.total_occurrences = stats["sample"]
-                    existing.win_count = stats["wins"]
-                    existing.win_rate = stats["win_rate"]
-                    existing.avg_return = stats["avg_return"]
-                    existing.last_validated = datetime.utcnow()
+                    update_rows.append({
+                        "id": existing_id,
+                        "total_occurrences": stats["sample"],
+                        "win_count": stats["wins"],
+                        "win_rate": stats["win_rate"],
+                        "avg_return": stats["avg_return"],
+                        "last_validated": now,
+                    })
                     continue
 
-                pattern = Pattern(
-                    name=self._generate_name(conditions),
-                    description=f"자동 발견된 패턴 (승률 {stats['win_rate']:.0%}, 샘플 {stats['sample']}건)",
-                    conditions=conditions,
-                    total_occurrences=stats["sample"],
-                    win_count=stats["wins"],
-                    win_rate=stats["win_rate"],
-                    avg_return=stats["avg_return"],
-                    is_active=True,
-                    confidence=stats["win_rate"] * 100,
-                )
-                db.add(pattern)
-                new_patterns.append({"name": pattern.name, "win_rate": stats["win_rate"]})
-                logger.info(f"🆕 새 패턴 발견: {pattern.name} (승률 {stats['win_rate']:.0%})")
-
+                name = self._generate_name(conditions)
+                new_rows.append({
+                    "name": name,
+                    "description": f"자동 발견된 패턴 (승률 {stats['win_rate']:.0%}, 샘플 {stats['sample']}건)",
+                    "conditions": conditions,
+                    "total_occurrences": stats["sample"],
+                    "win_count": stats["wins"],
+                    "win_rate": stats["win_rate"],
+                    "avg_return": stats["avg_return"],
+                    "is_active": True,
+                    "confidence": stats["win_rate"] * 100,
+                })
+                new_patterns.append({"name": name, "win_rate": stats["win_rate"]})
+                logger.info(f"🆕 새 패턴 발견: {name} (승률 {stats['win_rate']:.0%})")
+
+        # 행별 flush 대신 executemany 일괄 INSERT/UPDATE
+        if new_rows:
+            db.bulk_insert_mappings(Pattern, new_rows)
+        if update_rows:
+            db.bulk_update_mappings(Pattern, update_rows)
         db.commit()
         return new_patterns
 
-    def _find_winning_conditions(self, winners: list, losers: list) -> list:
+    def _find_winning_conditions(self, X: np.ndarray, wins: np.ndarray, pnl_pct: np.ndarray) -> list:
         """
         성공 매매의 공통 지표 조건 추출
         간단한 구간 분할 방식으로 클러스터링
+
+        Args:
+            X: (N, len(INDICATOR_KEYS)) 진입 지표 행렬
+            wins: (N,) 승리 여부
+            pnl_pct: (N,) 수익률
         """
         results = []
+        X_win = X[wins]
+        if len(X_win) == 0:
+            return results
 
-        # 각 지표별 최적 임계값 탐색
-        for key in INDICATOR_KEYS:
-            win_vals = [p.entry_indicators.get(key, 0) for p in winners if p.entry_indicators]
-            lose_vals = [p.entry_indicators.get(key, 0) for p in losers if p.entry_indicators]
+        # 각 지표별 최적 임계값 탐색 — 승리 매매의 사분위 구간 (지표별 1패스 집계)
+        q25, med, q75 = self._quantiles(X_win, (0.25, 0.5, 0.75))
+        in_range_wins, in_range_total, ret_sum = scan_ranges(X, wins, pnl_pct, q25, q75)
 
-            if not win_vals:
-                continue
-
-            # 승리 매매의 중앙값 기준 구간
-            win_median = float(np.median(win_vals))
-            win_q25 = float(np.percentile(win_vals, 25))
-            win_q75 = float(np.percentile(win_vals, 75))
-
-            # 이 구간에 해당하는 매매들의 승률 계산
+        for k in np.flatnonzero(in_range_total >= self.min_sample):
+            wins_k = int(in_range_wins[k])
+            total = int(in_range_total[k])
             condition = {
-                "indicator": key,
+                "indicator": INDICATOR_KEYS[k],
                 "operator": "between",
-                "value": [round(win_q25, 4), round(win_q75, 4)],
+                "value": [round(float(q25[k]), 4), round(float(q75[k]), 4)],
             }
-
-            in_range_wins = sum(1 for v in win_vals if win_q25 <= v <= win_q75)
-            in_range_losses = sum(1 for v in lose_vals if win_q25 <= v <= win_q75)
-            total = in_range_wins + in_range_losses
-
-            if total >= self.min_sample:
-                win_rate = in_range_wins / total
-                avg_ret = float(np.mean([p.pnl_pct for p in winners
-                                         if p.entry_indicators and
-                                         win_q25 <= p.entry_indicators.get(key, 0) <= win_q75]))
-
-                results.append((
-                    [condition],
-                    {
-                        "sample": total,
-                        "wins": in_range_wins,
-                        "win_rate": win_rate,
-                        "avg_return": avg_ret,
-                    }
-                ))
-
-        # 2개 지표 조합도 탐색
-        for i, key1 in enumerate(INDICATOR_KEYS):
-            for key2 in INDICATOR_KEYS[i+1:]:
-                combo_conditions, combo_stats = self._check_combo(winners, losers, key1, key2)
-                if combo_stats and combo_stats["sample"] >= self.min_sample:
-                    results.append((combo_conditions, combo_stats))
+            results.append((
+                [condition],
+                {
+                    "sample": total,
+                    "wins": wins_k,
+                    "win_rate": wins_k / total,
+                    "avg_return": float(ret_sum[k] / wins_k) if wins_k else float("nan"),
+                }
+            ))
+
+        # 2개 지표 조합도 탐색 — 승리 매매 중앙값 이상 조건의 모든 쌍 동시 출현 수
+        # (N, K, K) 불리언 텐서 대신 (K, N) @ (N, K) 행렬곱 — float32 정수 합은 2^24 미만에서 정확
+        ge = (X >= med).astype(np.float32)              # (N, K)
+        ge_win = ge[wins]
+        pair_total = np.rint(ge.T @ ge).astype(np.int64)
+        pair_wins = np.rint(ge_win.T @ ge_win).astype(np.int64)
+
+        for i, j in zip(*np.triu_indices(len(INDICATOR_KEYS), k=1)):
+            total = int(pair_total[i, j])
+            if total < self.min_sample:
+                continue
+            wins_ij = int(pair_wins[i, j])
+            conditions = [
+                {"indicator": INDICATOR_KEYS[i], "operator": ">=", "value": round(float(med[i]), 4)},
+                {"indicator": INDICATOR_KEYS[j], "operator": ">=", "value": round(float(med[j]), 4)},
+            ]
+            results.append((
+                conditions,
+                {
+                    "sample": total,
+                    "wins": wins_ij,
+                    "win_rate": wins_ij / total,
+                    "avg_return": 0,  # 간략화
+                }
+            ))
 
         return results
 
-    def _check_combo(self, winners, losers, key1, key2) -> tuple:
-        """2개 지표 조합의 승률 검증"""
-        win_v1 = [p.entry_indicators.get(key1, 0) for p in winners if p.entry_indicators]
-        win_v2 = [p.entry_indicators.get(key2, 0) for p in winners if p.entry_indicators]
-
-        if not win_v1 or not win_v2:
-            return [], None
-
-        med1 = float(np.median(win_v1))
-        med2 = float(np.median(win_v2))
-
-        # 중앙값 기준 필터
-        conditions = [
-            {"indicator": key1, "operator": ">=", "value": round(med1, 4)},
-            {"indicator": key2, "operator": ">=", "value": round(med2, 4)},
-        ]
-
-        wins = sum(1 for p in winners if p.entry_indicators and
-                   p.entry_indicators.get(key1, 0) >= med1 and
-                   p.entry_indicators.get(key2, 0) >= med2)
-        losses = sum(1 for p in losers if p.entry_indicators and
-                     p.entry_indicators.get(key1, 0) >= med1 and
-                     p.entry_indicators.get(key2, 0) >= med2)
-
-        total = wins + losses
-        if total < self.min_sample:
-            return [], None
-
-        return conditions, {
-            "sample": total,
-            "wins": wins,
-            "win_rate": wins / total,
-            "avg_return": 0,  # 간략화
-        }
+    @staticmethod
+    def _quantiles(a: np.ndarray, qs: tuple) -> list:
+        """
+        열별 분위수 — np.percentile(linear)과 동일 값을 전체 정렬 대신
+        np.partition(introselect, O(N))으로 필요한 순위만 뽑아 계산
+        """
+        n = a.shape[0]
+        pos = [q * (n - 1) for q in qs]
+        kth = sorted({int(np.floor(p)) for p in pos} | {int(np.ceil(p)) for p in pos})
+        parts = np.partition(a, kth, axis=0)
+        out = []
+        for p in pos:
+            lo, hi, t = parts[int(np.floor(p))], parts[int(np.ceil(p))], p - np.floor(p)
+            # numpy _lerp 과 동일한 보간식 (t >= 0.5 는 위쪽에서 역보간)
+            diff = hi - lo
+            out.append(hi - diff * (1 - t) if t >= 0.5 else lo + diff * t)
+        return out
+
+    @staticmethod
+    def _canon(conditions: list) -> tuple:
+        """조건 목록 → 순서 무관 hashable 키"""
+        return tuple(sorted(
+            (
+                c.get("indicator"),
+                c.get("operator"),
+                tuple(c["value"]) if isinstance(c.get("value"), list) else c.get("value"),
+            )
+            for c in conditions or ()
+        ))
 
     def _generate_name(self, conditions: list) -> str:
         """조건 기반 패턴 이름 자동 생성"""
@@ -7,33 +7,194 @@ Post-Trade Tracker
 - data/post_trade/ 디렉토리에 JSON 저장
 """
 import os
+import re
 import json
 import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# httpx + h2 설치 시 HTTP/2 단일 커넥션 멀티플렉싱 (없으면 requests 세션)
+try:
+    import httpx
+    import h2  # noqa: F401
+except ImportError:
+    httpx = None
 
 logger = logging.getLogger(__name__)
 
 POLYGON_API_KEY = os.getenv("POLYGON_API_KEY", "")
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "post_trade")
+# 종목 상세정보(섹터/산업) 디스크 캐시 — 거의 변하지 않으므로 7일 TTL
+TICKER_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "ticker_details_cache.json")
+TICKER_CACHE_TTL = 7 * 24 * 3600
+# 추적 상태 인덱스 — active 기록 조회 시 전체 JSON 파싱 대신 SQL 1회
+INDEX_PATH = os.path.join(DATA_DIR, "index.sqlite")
+_INDEX_LOCK = threading.Lock()
+# update_all 동시 처리 파일 수 (Polygon I/O 대기 겹치기)
+MAX_WORKERS = 16
+
+
+# 급등 원인 키워드 — dict 순서 = 분류 우선순위
+_CAUSE_KEYWORDS = {
+    "FDA": ("fda", "approval", "drug", "clinical", "trial"),
+    "earnings": ("earnings", "revenue", "profit", "quarterly", "beat"),
+    "short_squeeze": ("short squeeze", "short interest", "heavily shorted"),
+    "meme": ("reddit", "wallstreetbets", "meme", "viral", "social media"),
+    "catalyst": ("contract", "partnership", "deal", "acquisition", "merger"),
+}
+_CAUSE_PRIORITY = {name: i for i, name in enumerate(_CAUSE_KEYWORDS)}
+# lookahead(폭 0)로 매칭해 키워드가 서로 겹쳐도 모든 출현 위치를 검사
+_CAUSE_RE = re.compile(
+    "(?=" + "|".join(
+        f"(?P<{name}>" + "|".join(map(re.escape, kws)) + ")"
+        for name, kws in _CAUSE_KEYWORDS.items()
+    ) + ")"
+)
+# pyahocorasick 설치 시 Aho-Corasick 오토마톤으로 선형 1패스 스캔 (없으면 정규식)
+try:
+    import ahocorasick
+    _CAUSE_AUTOMATON = ahocorasick.Automaton()
+    for _name, _kws in _CAUSE_KEYWORDS.items():
+        for _kw in _kws:
+            _CAUSE_AUTOMATON.add_word(_kw, _CAUSE_PRIORITY[_name])
+    _CAUSE_AUTOMATON.make_automaton()
+except ImportError:
+    _CAUSE_AUTOMATON = None
+_CAUSE_NAMES = tuple(_CAUSE_KEYWORDS)
+_CAUSE_TAGS = {
+    "FDA": "biotech",
+    "earnings": "fundamental",
+    "short_squeeze": "squeeze",
+    "meme": "social",
+    "catalyst": "corporate_action",
+}
 
 
 def _ensure_dir():
     os.makedirs(DATA_DIR, exist_ok=True)
 
 
+def _write_json(path: str, obj):
+    """임시 파일에 쓴 뒤 os.replace로 교체 — 중단돼도 기존 파일이 깨지지 않음"""
+    if orjson:
+        data = orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        data = json.dumps(obj, indent=2, default=str).encode()
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _read_json(path: str) -> dict:
+    if orjson:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+@contextmanager
+def _index_db():
+    """인덱스 DB 커넥션 (스레드 간 공유 없이 호출마다 연결, 직렬화)"""
+    with _INDEX_LOCK:
+        conn = sqlite3.connect(INDEX_PATH)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+def _index_row(filename: str, record: dict) -> tuple:
+    return (
+        filename,
+        record.get("ticker"),
+        record.get("trade_date"),
+        record.get("tracking_status"),
+        record.get("last_updated"),
+    )
+
+
+def _format_bar(bar: dict, date: str) -> dict:
+    return {
+        "date": date,
+        "open": bar.get("o"),
+        "high": bar.get("h"),
+        "low": bar.get("l"),
+        "close": bar.get("c"),
+        "volume": bar.get("v"),
+    }
+
+
+def _format_article(article: dict) -> dict:
+    return {
+        "title": article.get("title", ""),
+        "url": article.get("article_url", ""),
+        "published": article.get("published_utc", ""),
+        "source": article.get("publisher", {}).get("name", ""),
+    }
+
+
 class PostTradeTracker:
     """매매 완료 종목 사후 추적"""
 
     def __init__(self):
         _ensure_dir()
+        self._session = self._make_session()
+        self._ticker_cache_lock = threading.Lock()
+        self._ticker_cache = self._load_ticker_cache()
+        self._init_index()
+
+    @staticmethod
+    def _make_session():
+        """
+        Polygon 공유 HTTP 클라이언트.
+        httpx 사용 가능 시 HTTP/2(요청 멀티플렉싱), 아니면 requests 세션
+        (keep-alive 커넥션 재사용 + 429/5xx 재시도). 둘 다 .get(url, params=, timeout=) 호환.
+        """
+        if httpx is not None:
+            limits = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+            return httpx.Client(
+                http2=True,
+                timeout=10.0,
+                limits=limits,
+                transport=httpx.HTTPTransport(http2=True, retries=3, limits=limits),
+            )
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=32, pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.5,
+                              status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=("GET",)),
+        )
+        session.mount("https://", adapter)
+        return session
 
     def record_trade(self, ticker: str, trade_date: str, trade_info: dict):
         """매매 완료 시 호출 — 초기 JSON 생성"""
         filename = f"{ticker}_{trade_date}.json"
         path = os.path.join(DATA_DIR, filename)
+        now = datetime.utcnow().isoformat()
 
         record = {
             "ticker": ticker,
@@ -45,8 +206,8 @@ class PostTradeTracker:
             "industry": None,
             "analysis": {"cause": "unknown", "tags": []},
             "tracking_status": "active",
-            "created_at": datetime.utcnow().isoformat(),
-            "last_updated": datetime.utcnow().isoformat(),
+            "created_at": now,
+            "last_updated": now,
         }
 
         # 즉시 ticker details 조회
@@ -55,76 +216,143 @@ class PostTradeTracker:
             record["sector"] = details.get("sector")
             record["industry"] = details.get("industry")
 
-        with open(path, "w") as f:
-            json.dump(record, f, indent=2, default=str)
+        self._save(path, record)
 
         logger.info(f"📝 Post-trade 기록 생성: {filename}")
 
     def update_all(self):
         """모든 active 기록 업데이트 (장 마감 후 호출)"""
         _ensure_dir()
-        for filename in os.listdir(DATA_DIR):
-            if not filename.endswith(".json"):
-                continue
-            path = os.path.join(DATA_DIR, filename)
-            try:
-                with open(path, "r") as f:
-                    record = json.load(f)
-            except Exception:
-                continue
-
-            if record.get("tracking_status") != "active":
-                continue
+        paths = self._active_paths()
+        if not paths:
+            return
+        # 기준 시각 1회 계산 → 모든 파일의 경과일/last_updated 에 재사용
+        now = datetime.utcnow()
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(paths))) as ex:
+            list(ex.map(lambda path: self._process_file(path, now), paths))
+
+    def update_all_batched(self):
+        """
+        모든 active 기록 일괄 업데이트 — 일봉 호출을 종목 수(N)에서
+        날짜 수(grouped daily aggs)로 축소. 뉴스는 종목별 조회 유지.
+        grouped 조회 실패 시 일봉만 종목별 조회로 fallback.
+        """
+        _ensure_dir()
+        now = datetime.utcnow()
+        active = []
+        for path in self._active_paths():
+            loaded = self._load_active(path, now)
+            if loaded:
+                active.append((path, *loaded))
+        if not active:
+            return
 
+        # 일봉: 추적 중인 모든 D+0~D+7 날짜의 grouped daily 1회씩
+        today = now.date().isoformat()
+        stamp = now.isoformat()
+        dates = sorted({
+            (td + timedelta(days=d)).date().isoformat()
+            for _, _, td, _ in active for d in range(8)
+        })
+        grouped = {date: self._fetch_grouped_daily(date) for date in dates if date <= today}
+        bars_ok = all(v is not None for v in grouped.values())
+
+        for path, record, td, days_elapsed in active:
             ticker = record["ticker"]
-            trade_date = record["trade_date"]
-
-            # D+5 지나면 완료 처리
-            try:
-                td = datetime.strptime(trade_date, "%Y-%m-%d")
-            except ValueError:
-                continue
-
-            days_elapsed = (datetime.utcnow() - td).days
-            if days_elapsed > 7:  # 주말 포함 여유
-                record["tracking_status"] = "completed"
-                self._analyze_cause(record)
-                self._save(path, record)
-                logger.info(f"✅ {filename} 추적 완료")
-                continue
-
-            # 일봉 수집
-            self._update_daily_bars(record, ticker, trade_date)
-
-            # 뉴스 수집
+            if bars_ok:
+                bars = {}
+                for d in range(8):
+                    date = (td + timedelta(days=d)).date().isoformat()
+                    bar = grouped.get(date, {}).get(ticker)
+                    if bar:
+                        bars[f"D+{d}"] = _format_bar(bar, date)
+                record["daily_bars"] = bars
+            else:
+                self._update_daily_bars(record, ticker, record["trade_date"])
+
             self._update_news(record, ticker)
 
-            record["last_updated"] = datetime.utcnow().isoformat()
+            record["last_updated"] = stamp
             self._save(path, record)
-            logger.info(f"📊 {filename} 업데이트 완료 (D+{days_elapsed})")
+            logger.info(f"📊 {os.path.basename(path)} 업데이트 완료 (D+{days_elapsed})")
+
+    def _process_file(self, path: str, now: datetime):
+        """기록 파일 1건 업데이트 (저장까지 자체 처리)"""
+        loaded = self._load_active(path, now)
+        if not loaded:
+            return
+        record, td, days_elapsed = loaded
+        ticker = record["ticker"]
+
+        # 일봉 수집
+        self._update_daily_bars(record, ticker, record["trade_date"])
+
+        # 뉴스 수집
+        self._update_news(record, ticker)
+
+        record["last_updated"] = now.isoformat()
+        self._save(path, record)
+        logger.info(f"📊 {os.path.basename(path)} 업데이트 완료 (D+{days_elapsed})")
+
+    def _load_active(self, path: str, now: datetime) -> Optional[tuple]:
+        """
+        추적 중인 기록 로드 → (record, trade_date datetime, 경과일) or None.
+        추적 기간이 지난 기록은 여기서 완료 처리 후 저장.
+        """
+        filename = os.path.basename(path)
+        try:
+            record = _read_json(path)
+        except Exception:
+            return None
+
+        if record.get("tracking_status") != "active":
+            self._index_record(path, record)
+            return None
+
+        # D+5 지나면 완료 처리
+        try:
+            td = datetime.fromisoformat(record["trade_date"])
+        except ValueError:
+            return None
+
+        days_elapsed = (now - td).days
+        if days_elapsed > 7:  # 주말 포함 여유
+            record["tracking_status"] = "completed"
+            self._analyze_cause(record)
+            self._save(path, record)
+            logger.info(f"✅ {filename} 추적 완료")
+            return None
+
+        return record, td, days_elapsed
+
+    def _fetch_grouped_daily(self, date: str) -> Optional[dict]:
+        """전종목 일봉 (grouped daily aggs) → {ticker: bar}, 실패 시 None"""
+        try:
+            url = f"https://api.polygon.io/v2/aggs/grouped/locale/us/market/stocks/{date}"
+            resp = self._session.get(url, params={"apiKey": POLYGON_API_KEY, "adjusted": "true"}, timeout=30)
+            resp.raise_for_status()
+            return {bar["T"]: bar for bar in resp.json().get("results") or [] if "T" in bar}
+        except Exception as e:
+            logger.error(f"{date} grouped 일봉 수집 실패: {e}")
+            return None
 
     def _update_daily_bars(self, record: dict, ticker: str, trade_date: str):
         """D+0~D+5 일봉 수집"""
         try:
-            td = datetime.strptime(trade_date, "%Y-%m-%d")
+            td = datetime.fromisoformat(trade_date)
+            td_ordinal = td.toordinal()
             end = td + timedelta(days=7)
             url = f"https://api.polygon.io/v2/aggs/ticker/{ticker}/range/1/day/{trade_date}/{end.strftime('%Y-%m-%d')}"
-            resp = requests.get(url, params={"apiKey": POLYGON_API_KEY, "limit": 10}, timeout=10)
+            resp = self._session.get(url, params={"apiKey": POLYGON_API_KEY, "limit": 10}, timeout=10)
             resp.raise_for_status()
             results = resp.json().get("results", [])
 
             bars = {}
             for bar in results:
-                bar_date = datetime.utcfromtimestamp(bar["t"] / 1000).strftime("%Y-%m-%d")
-                day_offset = (datetime.strptime(bar_date, "%Y-%m-%d") - td).days
-                bars[f"D+{day_offset}"] = {
-                    "date": bar_date,
-                    "open": bar.get("o"),
-                    "high": bar.get("h"),
-                    "low": bar.get("l"),
-                    "close": bar.get("c"),
-                    "volume": bar.get("v"),
-                }
+                bar_day = datetime.utcfromtimestamp(bar["t"] / 1000).date()
+                bar_date = bar_day.isoformat()
+                day_offset = bar_day.toordinal() - td_ordinal
+                bars[f"D+{day_offset}"] = _format_bar(bar, bar_date)
             record["daily_bars"] = bars
         except Exception as e:
             logger.error(f"{ticker} 일봉 수집 실패: {e}")
@@ -133,7 +361,7 @@ class PostTradeTracker:
         """관련 뉴스 수집"""
         try:
             url = "https://api.polygon.io/v2/reference/news"
-            resp = requests.get(url, params={
+            resp = self._session.get(url, params={
                 "ticker": ticker,
                 "limit": 10,
                 "apiKey": POLYGON_API_KEY,
@@ -141,26 +369,25 @@ class PostTradeTracker:
             resp.raise_for_status()
             results = resp.json().get("results", [])
 
-            news = []
-            for article in results:
-                news.append({
-                    "title": article.get("title", ""),
-                    "url": article.get("article_url", ""),
-                    "published": article.get("published_utc", ""),
-                    "source": article.get("publisher", {}).get("name", ""),
-                })
-            record["news"] = news
+            # 빈 응답으로 기존 뉴스를 덮어쓰지 않음
+            if results:
+                record["news"] = [_format_article(article) for article in results]
         except Exception as e:
             logger.error(f"{ticker} 뉴스 수집 실패: {e}")
 
     def _fetch_ticker_details(self, ticker: str) -> Optional[dict]:
-        """종목 상세정보 (섹터/산업)"""
+        """종목 상세정보 (섹터/산업) — 7일 이내 조회분은 디스크 캐시 사용"""
+        with self._ticker_cache_lock:
+            cached = self._ticker_cache.get(ticker)
+        if cached and time.time() - cached.get("fetched_at", 0) < TICKER_CACHE_TTL:
+            return cached["details"]
+
         try:
             url = f"https://api.polygon.io/v3/reference/tickers/{ticker}"
-            resp = requests.get(url, params={"apiKey": POLYGON_API_KEY}, timeout=10)
+            resp = self._session.get(url, params={"apiKey": POLYGON_API_KEY}, timeout=10)
             resp.raise_for_status()
             result = resp.json().get("results", {})
-            return {
+            details = {
                 "sector": result.get("sic_description", ""),
                 "industry": result.get("type", ""),
                 "name": result.get("name", ""),
@@ -170,30 +397,87 @@ class PostTradeTracker:
             logger.error(f"{ticker} 상세정보 조회 실패: {e}")
             return None
 
+        with self._ticker_cache_lock:
+            self._ticker_cache[ticker] = {"details": details, "fetched_at": time.time()}
+            _write_json(TICKER_CACHE_PATH, self._ticker_cache)
+        return details
+
+    @staticmethod
+    def _load_ticker_cache() -> dict:
+        try:
+            return _read_json(TICKER_CACHE_PATH)
+        except Exception:
+            return {}
+
     def _analyze_cause(self, record: dict):
         """급등 원인 분류"""
-        news_titles = " ".join([n.get("title", "").lower() for n in record.get("news", [])])
         tags = []
         cause = "unknown"
 
-        if any(kw in news_titles for kw in ["fda", "approval", "drug", "clinical", "trial"]):
-            cause = "FDA"
-            tags.append("biotech")
-        elif any(kw in news_titles for kw in ["earnings", "revenue", "profit", "quarterly", "beat"]):
-            cause = "earnings"
-            tags.append("fundamental")
-        elif any(kw in news_titles for kw in ["short squeeze", "short interest", "heavily shorted"]):
-            cause = "short_squeeze"
-            tags.append("squeeze")
-        elif any(kw in news_titles for kw in ["reddit", "wallstreetbets", "meme", "viral", "social media"]):
-            cause = "meme"
-            tags.append("social")
-        elif any(kw in news_titles for kw in ["contract", "partnership", "deal", "acquisition", "merger"]):
-            cause = "catalyst"
-            tags.append("corporate_action")
+        # 제목별 스캔 (합친 문자열 생성 없음) — 여러 원인이 매칭되면 우선순위가 높은 그룹 채택,
+        # 최우선 그룹이 나오면 나머지 제목은 건너뜀
+        best = len(_CAUSE_NAMES)
+        for article in record.get("news", []):
+            title = article.get("title", "").lower()
+            if _CAUSE_AUTOMATON is not None:
+                hits = (prio for _, prio in _CAUSE_AUTOMATON.iter(title))
+            else:
+                hits = (_CAUSE_PRIORITY[m.lastgroup] for m in _CAUSE_RE.finditer(title))
+            for prio in hits:
+                if prio < best:
+                    best = prio
+                    if best == 0:
+                        break
+            if best == 0:
+                break
+        if best < len(_CAUSE_NAMES):
+            cause = _CAUSE_NAMES[best]
+            tags.append(_CAUSE_TAGS[cause])
 
         record["analysis"] = {"cause": cause, "tags": tags}
 
     def _save(self, path: str, record: dict):
-        with open(path, "w") as f:
-            json.dump(record, f, indent=2, default=str)
+        _write_json(path, record)
+        self._index_record(path, record)
+
+    # ─── 추적 상태 인덱스 (SQLite) ─────────────────────────
+    def _init_index(self):
+        """인덱스 테이블 생성. 새로 만든 경우 기존 JSON으로 1회 재구축"""
+        with _index_db() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='tracking'"
+            ).fetchone()
+            if exists:
+                return
+            conn.execute(
+                "CREATE TABLE tracking (filename TEXT PRIMARY KEY, ticker TEXT, trade_date TEXT,"
+                " status TEXT, last_updated TEXT)"
+            )
+            conn.execute("CREATE INDEX idx_tracking_status ON tracking(status)")
+            rows = []
+            for filename in os.listdir(DATA_DIR):
+                if not filename.endswith(".json"):
+                    continue
+                try:
+                    record = _read_json(os.path.join(DATA_DIR, filename))
+                except Exception:
+                    continue
+                rows.append(_index_row(filename, record))
+            conn.executemany("INSERT OR REPLACE INTO tracking VALUES (?, ?, ?, ?, ?)", rows)
+        if rows:
+            logger.info(f"📇 Post-trade 인덱스 재구축: {len(rows)}건")
+
+    def _index_record(self, path: str, record: dict):
+        try:
+            with _index_db() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO tracking VALUES (?, ?, ?, ?, ?)",
+                    _index_row(os.path.basename(path), record),
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Post-trade 인덱스 갱신 실패: {e}")
+
+    def _active_paths(self) -> list:
+        with _index_db() as conn:
+            rows = conn.execute("SELECT filename FROM tracking WHERE status = 'active'").fetchall()
+        return [os.path.join(DATA_DIR, filename) for (filename,) in rows]
@@ -9,16 +9,20 @@ import os
 import sys
 import json
 import time
+import queue
 import signal
+import socket
 import logging
 import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import Optional
+from typing import Any, NamedTuple, Optional
 
-import yaml
 from dotenv import load_dotenv
 
+from utils.config import load_config
+
 load_dotenv()
 
 PAPER_MODE = os.getenv("PAPER_MODE", "").lower() in ("1", "true", "yes")
@@ -30,11 +34,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger("main")
 
-
-def load_config() -> dict:
-    cfg_path = os.path.join(os.path.dirname(__file__), "config", "config.yaml")
-    with open(cfg_path, "r") as f:
-        return yaml.safe_load(f)
+# 알림 메시지 구분선
+MSG_SEP = "━" * 14
 
 
 # ─── traded_tickers 파일 영속화 ────────────────────────────
@@ -66,22 +67,46 @@ def _save_traded_tickers(today: str, tickers: set[str]):
 
 
 # ─── 헬스체크 서버 (Railway용) ────────────────────────────
-class HealthHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.end_headers()
-        self.wfile.write(b'{"status":"ok"}')
-
-    def log_message(self, format, *args):
-        pass  # suppress logs
+_HEALTH_OK = b'{"status":"ok"}'
+# 요청 내용과 무관하게 고정 응답 — 요청별 핸들러 객체/파싱 없음
+_HEALTH_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: %d\r\n"
+    b"Connection: close\r\n\r\n" % len(_HEALTH_OK)
+) + _HEALTH_OK
+
+
+def _serve_health(sock: socket.socket):
+    """accept 루프 — 요청 헤더 끝(빈 줄)까지 읽고 고정 응답 후 종료"""
+    while True:
+        try:
+            conn, _ = sock.accept()
+        except OSError:
+            time.sleep(0.1)
+            continue
+        with conn:
+            try:
+                conn.settimeout(2)
+                buf = b""
+                while b"\r\n\r\n" not in buf and len(buf) < 8192:
+                    chunk = conn.recv(1024)
+                    if not chunk:
+                        break
+                    buf += chunk
+                conn.sendall(_HEALTH_RESPONSE)
+            except OSError:
+                pass
 
 
 def start_health_server(port: int = 8080):
     """비동기 헬스체크 HTTP 서버"""
     try:
-        server = HTTPServer(("0.0.0.0", port), HealthHandler)
-        t = threading.Thread(target=server.serve_forever, daemon=True)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("0.0.0.0", port))
+        sock.listen(16)
+        t = threading.Thread(target=_serve_health, args=(sock,), daemon=True)
         t.start()
         logger.info(f"🏥 헬스체크 서버 시작 (port {port})")
     except Exception as e:
@@ -92,16 +117,23 @@ def start_health_server(port: int = 8080):
 class KISScanThread(threading.Thread):
     """KIS 현재가 API로 워치리스트를 백그라운드 스캔 (별도 스레드)"""
 
+    SCAN_INTERVAL = 5  # 스캔 사이 대기 (초)
+
     def __init__(self, kis_scanner):
         super().__init__(daemon=True)
         self.scanner = kis_scanner
-        self.latest_candidates: list[dict] = []
+        self.latest_candidates: list[dict[str, Any]] = []
         self.lock = threading.Lock()
         self._running = True
+        self._active = threading.Event()  # 매매 시간에만 set — 장외에는 KIS 호출 없음
+        self._wake = threading.Event()    # poke() 시 대기 중단 → 즉시 재스캔
 
     def run(self):
         logger.info("🚀 KIS 스캔 스레드 시작")
         while self._running:
+            self._active.wait()
+            if not self._running:
+                break
             try:
                 result = self.scanner.scan_once()
                 with self.lock:
@@ -110,26 +142,43 @@ class KISScanThread(threading.Thread):
                     logger.info(f"🔥 KIS 스캔: {len(result)}개 후보 갱신")
             except Exception as e:
                 logger.error(f"KIS 스캔 오류: {e}", exc_info=True)
-            time.sleep(5)  # 스캔 사이 5초 대기
+            self._wake.wait(self.SCAN_INTERVAL)
+            self._wake.clear()
 
-    def get_candidates(self) -> list[dict]:
+    def get_candidates(self) -> list[dict[str, Any]]:
         with self.lock:
             return list(self.latest_candidates)
 
+    def set_active(self, active: bool):
+        """매매 시간 진입/이탈 시 호출"""
+        if active == self._active.is_set():
+            return
+        if active:
+            self._active.set()
+        else:
+            self._active.clear()
+            with self.lock:
+                self.latest_candidates = []
+
+    def poke(self):
+        """다음 스캔을 즉시 실행"""
+        self._wake.set()
+
     def stop(self):
         self._running = False
+        self._active.set()
+        self._wake.set()
 
 
-def merge_candidates(polygon_candidates: list[dict], kis_candidates: list[dict]) -> list[dict]:
+def merge_candidates(polygon_candidates: list[dict[str, Any]],
+                     kis_candidates: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Polygon + KIS 후보 병합 (중복 제거, KIS 우선)"""
-    seen = {}
-    # KIS 결과 먼저 (실시간 데이터 우선)
-    for c in kis_candidates:
-        seen[c["ticker"]] = c
-    # Polygon 결과 (중복 아닌 것만)
+    # KIS 결과 먼저 (실시간 데이터 우선) — 순서 유지
+    seen = {c["ticker"]: c for c in kis_candidates}
+    # Polygon 결과 (중복 아닌 것만) — setdefault 1회 probe로 검사+삽입
+    add = seen.setdefault
     for c in polygon_candidates:
-        if c["ticker"] not in seen:
-            seen[c["ticker"]] = c
+        add(c["ticker"], c)
     return list(seen.values())
 
 
@@ -137,22 +186,28 @@ class BatchNotifier:
     """알림 메시지를 모아서 5분마다 배치 전송"""
 
     BATCH_INTERVAL = 300  # 5분
+    MAX_DEDUP = 2048  # dedup 키 보관 상한 (오래 안 쓰인 키부터 제거)
 
     def __init__(self):
-        self._queue: list[str] = []
-        self._sent_set: set[str] = set()  # 중복 방지 (후보 알림 등)
+        # deque.append/popleft 는 C 레벨 원자 연산 → 큐 자체는 락 불필요
+        self._queue: deque[str] = deque()
+        self._sent: OrderedDict[str, None] = OrderedDict()  # 중복 방지 (후보 알림 등) — bounded LRU
         self._reported_tickers: set[str] = set()  # 세션 동안 보고된 종목
-        self._lock = threading.Lock()
-        self._last_flush = time.time()
+        self._lock = threading.Lock()  # dedup 검사+추가 / 큐 비우기 직렬화
+        self._last_flush = time.monotonic()
 
     def add(self, text: str, dedup_key: str = ""):
         """메시지 큐에 추가. dedup_key가 있으면 같은 키 중복 전송 방지"""
-        with self._lock:
-            if dedup_key:
-                if dedup_key in self._sent_set:
+        if dedup_key:
+            with self._lock:
+                sent = self._sent
+                if dedup_key in sent:
+                    sent.move_to_end(dedup_key)
                     return
-                self._sent_set.add(dedup_key)
-            self._queue.append(text)
+                sent[dedup_key] = None
+                if len(sent) > self.MAX_DEDUP:
+                    sent.popitem(last=False)
+        self._queue.append(text)
 
     def is_ticker_reported(self, ticker: str) -> bool:
         """이미 보고된 종목인지 확인"""
@@ -162,28 +217,40 @@ class BatchNotifier:
         """종목을 보고 완료로 마킹"""
         self._reported_tickers.add(ticker)
 
+    def mark_tickers_reported(self, tickers):
+        """여러 종목을 한 번에 보고 완료로 마킹"""
+        self._reported_tickers.update(tickers)
+
+    def reported_snapshot(self) -> frozenset[str]:
+        """보고된 종목 스냅샷 (후보 필터링용)"""
+        return frozenset(self._reported_tickers)
+
+    def _drain(self) -> list[str]:
+        with self._lock:
+            queue = self._queue
+            return [queue.popleft() for _ in range(len(queue))]
+
     def flush_if_ready(self):
         """5분 경과 시 큐에 쌓인 메시지를 합쳐서 한번에 전송"""
-        now = time.time()
+        # 대부분의 틱은 여기서 종료 — 락 없이 단조 시계 비교만
+        now = time.monotonic()
         if now - self._last_flush < self.BATCH_INTERVAL:
             return
         self._last_flush = now
-        with self._lock:
-            if not self._queue:
-                return
-            combined = "\n\n".join(self._queue)
-            self._queue.clear()
-        _send_telegram(combined)
+        if not self._queue:
+            return
+        msgs = self._drain()
+        if msgs:
+            _send_telegram("\n\n".join(msgs))
 
     def force_flush(self):
         """즉시 전송 (세션 시작, 강제청산 등 중요 알림)"""
-        with self._lock:
-            if not self._queue:
-                return
-            combined = "\n\n".join(self._queue)
-            self._queue.clear()
-        self._last_flush = time.time()
-        _send_telegram(combined)
+        if not self._queue:
+            return
+        msgs = self._drain()
+        self._last_flush = time.monotonic()
+        if msgs:
+            _send_telegram("\n\n".join(msgs))
 
     def send_immediate(self, text: str):
         """즉시 단독 전송"""
@@ -192,17 +259,132 @@ class BatchNotifier:
     def reset_dedup(self):
         """세션 리셋 시 중복 세트 + 보고 종목 초기화"""
         with self._lock:
-            self._sent_set.clear()
+            self._sent.clear()
             self._reported_tickers.clear()
 
 
+class HeldPosition(NamedTuple):
+    """잔고 보유 종목 1건 — 틱 루프에서 dict 조회 대신 속성 접근"""
+    ticker: str
+    avg_price: float
+    current_price: Optional[float]
+    quantity: int
+
+
+def _held_positions(balance: dict[str, Any]) -> list[HeldPosition]:
+    """잔고 dict의 positions → HeldPosition 리스트"""
+    return [
+        HeldPosition(p["ticker"], p["avg_price"], p.get("current_price"), p.get("quantity", 0))
+        for p in balance.get("positions", [])
+    ]
+
+
+class PositionCache:
+    """
+    KIS 잔고 캐시 — 매 틱 브로커 HTTP 호출 대신 TTL 동안 재사용.
+    매수/매도/강제청산 직후 invalidate()로 다음 조회 시 즉시 갱신.
+    조회 실패("error")는 캐시하지 않음 — 다음 틱에 재조회, 직전 정상 결과가 없으면 None.
+    """
+
+    def __init__(self, fetch, ttl: float = 15):
+        self._fetch = fetch
+        self._ttl = ttl
+        self._data: dict[str, Any] = {}
+        self._ts = 0.0
+        self._dirty = True
+
+    def is_stale(self) -> bool:
+        return self._dirty or time.monotonic() - self._ts >= self._ttl
+
+    def get(self) -> Optional[dict[str, Any]]:
+        if self.is_stale():
+            # 조회 중 들어온 invalidate()가 유지되도록 먼저 해제, 실패 시 되돌림
+            self._dirty = False
+            data = self._fetch()
+            if data.get("error"):
+                self._dirty = True
+                logger.warning("잔고 조회 실패 — 캐시 유지, 다음 틱 재조회")
+                return self._data or None
+            # 보유 종목 변환은 조회 시 1회 (TTL 동안 재사용)
+            data["held"] = _held_positions(data)
+            self._data = data
+            self._ts = time.monotonic()
+        return self._data
+
+    def invalidate(self):
+        self._dirty = True
+
+
+class TelegramSender(threading.Thread):
+    """
+    텔레그램 전송 전용 스레드 — 트레이딩 루프는 큐에 넣기만 하고
+    느린 응답/429 대기에 블로킹되지 않음
+    """
+
+    _STOP = object()
+    MAX_MESSAGE_LEN = 4096  # Telegram sendMessage 텍스트 한도
+
+    def __init__(self, maxsize: int = 256):
+        super().__init__(daemon=True, name="telegram-sender")
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._telegram = None  # TelegramNotifier (전송 스레드에서 생성)
+        self._start_lock = threading.Lock()
+
+    def submit(self, text: str):
+        """전송 예약 (첫 호출 시 스레드 시작). 큐가 가득 차면 버림"""
+        if not self.is_alive():
+            with self._start_lock:
+                if not self.is_alive() and self.ident is None:
+                    self.start()
+        try:
+            self._queue.put_nowait(text)
+        except queue.Full:
+            logger.warning("알림 큐 가득 참 — 메시지 버림")
+
+    def run(self):
+        pending = None
+        while True:
+            text = self._queue.get() if pending is None else pending
+            pending = None
+            if text is self._STOP:
+                return
+            # 이전 전송 중 쌓인 메시지를 한 건으로 합쳐 API 호출 수 절감 (메시지 길이 한도 내)
+            parts, size = [text], len(text)
+            while True:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is self._STOP or size + 2 + len(nxt) > self.MAX_MESSAGE_LEN:
+                    pending = nxt
+                    break
+                parts.append(nxt)
+                size += 2 + len(nxt)
+            self._deliver("\n\n".join(parts))
+
+    def _deliver(self, text: str):
+        try:
+            if self._telegram is None:
+                from notifier.telegram_bot import TelegramNotifier
+                self._telegram = TelegramNotifier()
+            self._telegram.send_sync(text)
+        except Exception as e:
+            logger.warning(f"알림 실패: {e}")
+
+    def close(self, timeout: float = 10):
+        """남은 메시지 전송 후 종료 (최대 timeout초 대기)"""
+        if not self.is_alive():
+            return
+        self._queue.put(self._STOP)
+        self.join(timeout)
+
+
+_sender = TelegramSender()
+
+
 def _send_telegram(text: str):
-    """텔레그램 실제 전송 (내부용)"""
-    try:
-        from notifier.telegram_bot import TelegramNotifier
-        TelegramNotifier().send_sync(text)
-    except Exception as e:
-        logger.warning(f"알림 실패: {e}")
+    """텔레그램 전송 (내부용) — 전송 스레드 큐에 넣고 즉시 반환"""
+    _sender.submit(text)
 
 
 # 글로벌 배치 알림 인스턴스
@@ -233,10 +415,7 @@ def run_live(config: dict):
     from trader.executor import TradeExecutor
     from trader.bb_trailing import BBTrailingStop
     from trader.market_governor import MarketGovernor, ABSOLUTE_CAP
-    from trader.market_hours import (
-        is_trading_window, is_scan_active, minutes_until_session_end,
-        get_all_timestamps, get_trading_date, now_kst,
-    )
+    from trader.market_hours import tick_context
     from knowledge.file_store import FileStore
     from knowledge.post_trade_tracker import PostTradeTracker
     from knowledge.bar_recorder import BarRecorder
@@ -256,6 +435,7 @@ def run_live(config: dict):
     scanner = SnapshotScanner(config, monitoring_queue, queue_lock)
     analyzer = SignalGenerator(None, config)
     executor = TradeExecutor(None, config)
+    pos_cache = PositionCache(executor.kis.get_balance, ttl=15)
     bb_trailing = BBTrailingStop(config)
     governor = MarketGovernor(config)
     store = FileStore()
@@ -334,14 +514,16 @@ def run_live(config: dict):
     force_close_before_min = trading_cfg.get("force_close_before_min", 15)
 
     SCAN_INTERVAL = 2  # seconds
+    IDLE_SCAN_MAX = 10  # 후보·보유 없음이 이어질 때 최대 스캔 간격
     SLEEP_CHECK_INTERVAL = 300  # 5min when outside trading hours
+    SHUTDOWN_TIMEOUT = 10  # 종료 시 백그라운드 스레드 전체 대기 상한 (초)
 
-    running = True
+    # 종료 이벤트 — 대기 중(최대 5분)에도 시그널 즉시 깨어남
+    stop_event = threading.Event()
 
     def shutdown(signum, frame):
-        nonlocal running
         logger.info("종료 시그널 수신")
-        running = False
+        stop_event.set()
 
     signal.signal(signal.SIGINT, shutdown)
     signal.signal(signal.SIGTERM, shutdown)
@@ -349,16 +531,26 @@ def run_live(config: dict):
     sleep_logged = False
     last_post_trade_update = None
     scan_count = 0
+    idle_streak = 0  # 후보·보유 종목 모두 없는 연속 틱 수
     session_start_notified = False
 
-    while running:
+    # 틱당 독립적인 블로킹 I/O (스냅샷 스캔 ↔ KIS 잔고 조회) 동시 실행용
+    io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tick-io")
+    # 스냅샷에 없는 보유 종목의 KIS 현재가 fallback 동시 조회용
+    price_pool = ThreadPoolExecutor(max_workers=max(max_positions, 2), thread_name_prefix="price")
+
+    while not stop_event.is_set():
         try:
-            now = now_kst()
+            tick_start = time.monotonic()
+            # 틱당 시각 정보 1회 계산 (now/매매 윈도우/매매일/잔여분)
+            tick = tick_context()
+            now = tick.now
 
             # ── 매매 시간 외 ─────────────────────────────
-            if not is_trading_window():
+            if not tick.in_window:
+                kis_thread.set_active(False)
                 # 17:50~18:00 프리마켓 준비 구간: 스냅샷 스캔 + BarScanner 후보 전달
-                if is_scan_active():
+                if tick.scan_active:
                     if not sleep_logged:
                         logger.info("🔭 프리마켓 준비 (17:50) — 3분봉 데이터 사전 축적 시작")
                         sleep_logged = True
@@ -368,7 +560,7 @@ def run_live(config: dict):
                             bar_scanner.set_candidates(bar_candidates)
                     except Exception:
                         pass
-                    time.sleep(SCAN_INTERVAL)
+                    stop_event.wait(SCAN_INTERVAL)
                     continue
 
                 if not sleep_logged:
@@ -382,7 +574,7 @@ def run_live(config: dict):
                     _notifier.reset_dedup()
                     _traded_tickers.clear()
                     _traded_twice_tickers.clear()
-                    _today_date = _get_td()
+                    _today_date = tick.trading_date
                     _save_traded_tickers(_today_date, _traded_tickers)
                     _traded_once_tickers.clear()
                     logger.info("🔄 _traded_tickers / _traded_once_tickers 초기화 (새 세션)")
@@ -392,16 +584,17 @@ def run_live(config: dict):
                     today = now.strftime("%Y-%m-%d")
                     if last_post_trade_update != today:
                         try:
-                            tracker.update_all()
+                            tracker.update_all_batched()
                             last_post_trade_update = today
                         except Exception as e:
                             logger.error(f"Post-trade 업데이트 실패: {e}")
 
-                time.sleep(SLEEP_CHECK_INTERVAL)
+                stop_event.wait(SLEEP_CHECK_INTERVAL)
                 continue
 
             sleep_logged = False
-            trading_date = get_trading_date()
+            kis_thread.set_active(True)
+            trading_date = tick.trading_date
 
             # 세션 시작 (내부 마킹만, 알림 없음)
             if not session_start_notified:
@@ -409,35 +602,46 @@ def run_live(config: dict):
                 logger.info(f"🟢 매매 세션 시작 — {now.strftime('%H:%M KST')}")
 
             # ── 강제청산 체크 ─────────────────────────────
-            remaining = minutes_until_session_end()
+            remaining = tick.remaining_min
             has_positions = (
-                (PAPER_MODE and paper_trader and len(paper_trader.positions) > 0)
+                (PAPER_MODE and paper_trader and paper_trader.has_open_positions())
                 or (not PAPER_MODE and executor and executor.has_open_positions())
             )
             if 0 < remaining <= force_close_before_min:
                 if has_positions:
                     logger.warning(f"🚨 장마감 {remaining:.0f}분 전 — 강제청산")
                     if PAPER_MODE and paper_trader:
-                        for ticker in list(paper_trader.positions.keys()):
-                            snap_p = scanner.get_price(ticker) or paper_trader.positions[ticker]['avg_price']
-                            paper_trader.sell(ticker, snap_p)
+                        held = paper_trader.positions
+                        close_prices = scanner.get_prices(list(held))
+                        with paper_trader:  # 전 종목 청산 후 스냅샷 1회
+                            for ticker, snap_p in close_prices.items():
+                                snap_p = snap_p or held[ticker]['avg_price']
+                                paper_trader.sell(ticker, snap_p)
                     else:
                         executor.force_close_all_positions()
+                        pos_cache.invalidate()
                     send_notification(
-                        f"🚨 장마감 강제청산 실행\n"
-                        f"━━━━━━━━━━━━━━\n"
-                        f"잔여: {remaining:.0f}분\n"
-                        f"총 스캔: {scan_count}회\n"
-                        f"━━━━━━━━━━━━━━",
+                        "\n".join([
+                            "🚨 장마감 강제청산 실행",
+                            MSG_SEP,
+                            f"잔여: {remaining:.0f}분",
+                            f"총 스캔: {scan_count}회",
+                            MSG_SEP,
+                        ]),
                         immediate=True
                     )
                 else:
                     logger.info(f"장마감 {remaining:.0f}분 전 — 포지션 없음, 스킵")
                 session_start_notified = False
                 scan_count = 0
-                time.sleep(60)
+                stop_event.wait(60)
                 continue
 
+            # KIS 잔고 조회는 스냅샷 스캔과 독립 → 캐시 만료 시에만 백그라운드로 먼저 시작
+            balance_future = None
+            if not (PAPER_MODE and paper_trader) and pos_cache.is_stale():
+                balance_future = io_pool.submit(pos_cache.get)
+
             # ── Snapshot 스캔 + KIS 결과 병합 ─────────────
             candidates, bar_candidates = scanner.scan_once()
             # BarScanner에 후보 전달 (5%+ 급등 종목 → 3분봉 체크 대상)
@@ -455,25 +659,49 @@ def run_live(config: dict):
             if not governor.should_trade():
                 logger.warning(f"🛑 급락장 감지 — 매매 중단 (SPY {governor.market_info['spy_change']:+.1f}%)")
                 send_notification(f"🛑 급락장 감지 — 매매 중단\nSPY: {governor.market_info['spy_change']:+.1f}%", immediate=True)
-                time.sleep(30)
+                stop_event.wait(30)
                 continue
 
             # ── 보유종목 모니터링 (BB 트레일링) ───────────
-            if PAPER_MODE and paper_trader:
+            # 캐시에서 재사용한 잔고(최대 TTL 경과)의 현재가는 청산 판단에 쓰지 않음
+            balance_fresh = True
+            if balance_future is not None:
+                balance = balance_future.result()
+                # 조회 실패 시 직전 캐시가 반환됨 (is_stale 유지)
+                balance_fresh = not pos_cache.is_stale()
+            elif PAPER_MODE and paper_trader:
                 balance = paper_trader.get_balance()
+                balance["held"] = _held_positions(balance)
             else:
-                balance = executor.kis.get_balance()
-            positions = balance.get("positions", [])
+                balance = pos_cache.get()
+                balance_fresh = False
+            if balance is None:
+                # 정상 잔고가 한 번도 없으면 청산/진입 판단 모두 보류
+                logger.warning("잔고 미확인 — 이번 틱 매매 판단 스킵")
+                stop_event.wait(SCAN_INTERVAL)
+                continue
+            positions = balance["held"]
             current_count = len(positions)
+            # 보유 종목 실시간 가격 — 스냅샷에서 한 번에 조회
+            snap_prices = scanner.get_prices([p.ticker for p in positions])
+            # 스냅샷·잔고 모두 가격이 없는 종목만 KIS 현재가 조회 — 직렬 대신 동시 실행
+            missing = [
+                p.ticker for p in positions
+                if not snap_prices.get(p.ticker) and not (balance_fresh and p.current_price)
+            ]
+            kis_prices = (
+                dict(zip(missing, price_pool.map(executor.kis.get_current_price, missing)))
+                if missing else {}
+            )
 
             for pos in positions:
-                ticker = pos["ticker"]
+                ticker = pos.ticker
                 # 보유 중인 종목은 _traded_tickers에 등록 (수동 매수 포함)
                 _mark_traded(ticker)
-                avg_price = pos["avg_price"]
+                avg_price = pos.avg_price
                 # snapshot에서 실시간 가격 가져오기
-                snap_price = scanner.get_price(ticker)
-                current_price = snap_price or pos.get("current_price") or executor.kis.get_current_price(ticker)
+                snap_price = snap_prices.get(ticker)
+                current_price = snap_price or (balance_fresh and pos.current_price) or kis_prices.get(ticker)
 
                 if not current_price:
                     continue
@@ -490,8 +718,10 @@ def run_live(config: dict):
                         paper_trader.sell(ticker, current_price)
                     elif action == "STOP":
                         executor.execute_stop_loss(ticker)
+                        pos_cache.invalidate()
                     else:
                         executor.execute_sell(ticker)
+                        pos_cache.invalidate()
 
                     # [v9] 매도 후 차수 판별
                     # ※ 주의: _mark_traded는 BUY 시점에 이미 호출됨
@@ -527,7 +757,7 @@ def run_live(config: dict):
                             "pnl_pct": pnl_pct,
                             "avg_price": avg_price,
                             "exit_price": current_price,
-                            "quantity": pos.get("quantity", 0),
+                            "quantity": pos.quantity,
                         })
                     except Exception as e:
                         logger.error(f"Post-trade 기록 실패: {e}")
@@ -550,19 +780,19 @@ def run_live(config: dict):
                 if available_cash < 10:
                     logger.info(f"💰 가용 잔고 부족 (${available_cash:.2f}) — 매수 스킵")
                     # 포지션 풀과 동일하게 마킹만
-                    for c in candidates[:5]:
-                        _notifier.mark_ticker_reported(c['ticker'])
+                    _notifier.mark_tickers_reported(c['ticker'] for c in candidates[:5])
                     candidates = []  # 아래 매수 루프 진입 방지
 
             if candidates and current_count < max_positions:
                 # 후보 감지 알림 (최초 발견만)
-                new_cands = [c for c in candidates[:5] if not _notifier.is_ticker_reported(c['ticker'])]
+                reported = _notifier.reported_snapshot()
+                new_cands = [c for c in candidates[:5] if c['ticker'] not in reported]
                 if new_cands:
-                    cand_text = "🔍 신규 후보 감지\n"
+                    lines = ["🔍 신규 후보 감지"]
                     for c in new_cands:
-                        cand_text += f"  {c['ticker']}: ${c['price']:.2f} ({c['change_pct']:+.1f}%) vol:{c.get('volume_ratio', 0):.0f}%\n"
-                        _notifier.mark_ticker_reported(c['ticker'])
-                    send_notification(cand_text.strip())
+                        lines.append(f"  {c['ticker']}: ${c['price']:.2f} ({c['change_pct']:+.1f}%) vol:{c.get('volume_ratio', 0):.0f}%")
+                    _notifier.mark_tickers_reported(c['ticker'] for c in new_cands)
+                    send_notification("\n".join(lines))
 
                 for cand in candidates:
                     if current_count >= max_positions:
@@ -676,11 +906,11 @@ def run_live(config: dict):
                         if result:
                             bb_trailing.register_entry(ticker, is_second=is_second_cand, is_third=is_third_cand)
                             current_count += 1
+                            kis_thread.poke()  # 신규 포지션 반영된 KIS 후보 즉시 재스캔
                             store.save_signal(sig)
 
                             # [v10.4] BudgetLearner 거래 기록 (paper: slippage=0, fill_rate=1.0)
                             try:
-                                from trader.market_hours import get_trading_date as _gtd
                                 budget_learner.record_trade(
                                     ticker=ticker,
                                     price=price,
@@ -689,7 +919,7 @@ def run_live(config: dict):
                                     filled_krw=int(result.get("total_krw", buy_amount)),
                                     slippage_pct=0.0,   # paper: 슬리피지 미적용
                                     entry_type=entry_label,
-                                    date_str=_gtd().isoformat() if hasattr(_gtd(), "isoformat") else str(_gtd()),
+                                    date_str=trading_date,
                                 )
                             except Exception as e:
                                 logger.warning(f"budget_learner 기록 실패: {e}")
@@ -715,6 +945,7 @@ def run_live(config: dict):
                             send_notification(f"[가상] ❌ {ticker} 매수 실패 — 잔고 부족")
                     else:
                         orders = executor.execute_buy(ticker, price)
+                        pos_cache.invalidate()
                         # [v10.3] 1차/2차/3차 구분 마킹 (is_third 누락 버그 수정)
                         _mark_traded(ticker, is_second=is_second_cand and not is_third_cand,
                                              is_third=is_third_cand)
@@ -722,6 +953,7 @@ def run_live(config: dict):
                         if orders:
                             bb_trailing.register_entry(ticker, is_second=is_second_cand, is_third=is_third_cand)
                             current_count += 1
+                            kis_thread.poke()
                             store.save_signal(sig)
 
                             # [v10.4] BudgetLearner 실전 기록 (실제 체결 데이터)
@@ -729,7 +961,6 @@ def run_live(config: dict):
                                 filled_krw  = sum(o.get("filled_krw", 0) for o in orders) if isinstance(orders, list) else 0
                                 avg_fill_p  = sum(o.get("price", price) for o in orders) / len(orders) if isinstance(orders, list) and orders else price
                                 slippage    = ((avg_fill_p - price) / price) * 100 if price > 0 else 0.0
-                                from trader.market_hours import get_trading_date as _gtd2
                                 budget_learner.record_trade(
                                     ticker=ticker,
                                     price=price,
@@ -738,7 +969,7 @@ def run_live(config: dict):
                                     filled_krw=int(filled_krw),
                                     slippage_pct=round(slippage, 2),
                                     entry_type=entry_label,
-                                    date_str=_gtd2().isoformat() if hasattr(_gtd2(), "isoformat") else str(_gtd2()),
+                                    date_str=trading_date,
                                 )
                             except Exception as e:
                                 logger.warning(f"budget_learner 실전 기록 실패: {e}")
@@ -763,20 +994,36 @@ def run_live(config: dict):
                             logger.warning(f"⚠️ {ticker} 매수 실패 (호가 조회 실패 등) — 스킵 처리")
             elif candidates and current_count >= max_positions:
                 # 포지션 풀 — 최초 발견 종목만 기록 (알림 없이 마킹만)
-                for c in candidates[:5]:
-                    _notifier.mark_ticker_reported(c['ticker'])
+                _notifier.mark_tickers_reported(c['ticker'] for c in candidates[:5])
 
             # 배치 알림 플러시 (1분 경과 시)
             _notifier.flush_if_ready()
 
-            time.sleep(SCAN_INTERVAL)
+            # 스캔 주기 = 틱 시작 기준 (작업 시간만큼 대기 단축)
+            # 후보·보유 없는 구간은 간격을 점진적으로 늘리고, 하나라도 생기면 즉시 2초 복귀
+            idle_streak = idle_streak + 1 if not candidates and not positions else 0
+            interval = min(SCAN_INTERVAL * (1 + idle_streak), IDLE_SCAN_MAX)
+            stop_event.wait(max(0.0, interval - (time.monotonic() - tick_start)))
 
         except KeyboardInterrupt:
             break
         except Exception as e:
             logger.error(f"루프 오류: {e}", exc_info=True)
-            time.sleep(10)
-
+            stop_event.wait(10)
+
+    # 종료 신호를 모든 백그라운드 작업에 먼저 보낸 뒤, 공통 마감시각 안에서 한꺼번에 수렴
+    kis_thread.stop()
+    bar_scanner.stop()
+    io_pool.shutdown(wait=False)
+    price_pool.shutdown(wait=False)
+    if paper_trader:
+        paper_trader.close()
+    deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+    _sender.close(timeout=SHUTDOWN_TIMEOUT)
+    for t in (kis_thread, bar_scanner):
+        t.join(max(0.0, deadline - time.monotonic()))
+        if t.is_alive():
+            logger.warning(f"{type(t).__name__} 종료 대기 시간 초과")
     logger.info("🛑 stock-bot 종료")
 
 
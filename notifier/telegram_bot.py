@@ -6,14 +6,81 @@
 - 일일 리포트
 """
 import os
+import time
 import logging
 from typing import Optional
 
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
 USE_STUB = not TELEGRAM_BOT_TOKEN or TELEGRAM_BOT_TOKEN == "your_telegram_bot_token_here"
+SEND_MESSAGE_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# 알림 템플릿 — 모듈 로드 시 1회 구성, 전송 시에는 format만 수행
+_SEP = "━" * 14
+_TREND_LABELS = {"UP": "📈 상승", "DOWN": "📉 하락"}
+_DISCOVERY_TMPL = (
+    "🔍 종목 발굴\n"
+    f"{_SEP}\n"
+    "티커: {ticker}\n"
+    "현재가: ${price:.2f}\n"
+    "5분 변동: {change_pct:+.1f}%\n"
+    "거래량비: {volume_ratio:.0f}%\n"
+    "시총: ${market_cap:,.0f}\n"
+    f"{_SEP}\n"
+    "추세: {trend} (신뢰도 {confidence:.0f}%)"
+)
+_BUY_TMPL = (
+    "✅ 매수 완료\n"
+    f"{_SEP}\n"
+    "티커: {ticker}\n"
+    "매수수량: {quantity}주 (10분할 완료)\n"
+    "평균매입가: ${avg_price:.2f}\n"
+    "총매수금액: ₩{total_amount:,.0f}\n"
+    f"{_SEP}\n"
+    "목표가(+30%): ${take_profit:.2f}\n"
+    "손절가(-15%): ${stop_loss:.2f}"
+)
+_SELL_TMPL = (
+    "{emoji} 매도 실행\n"
+    f"{_SEP}\n"
+    "티커: {ticker}\n"
+    "매도수량: {quantity}주 (일괄)\n"
+    "매도가: ${sell_price:.2f}\n"
+    "수익률: {pnl_pct:+.1f}%\n"
+    "실현손익: ₩{pnl_amount:+,.0f}\n"
+    f"{_SEP}\n"
+    "사유: {reason}"
+)
+_STOP_LOSS_TMPL = (
+    "🚨 긴급 손절\n"
+    f"{_SEP}\n"
+    "티커: {ticker}\n"
+    "수량: {quantity}주\n"
+    "손절가: ${price:.2f}\n"
+    "손실률: {pnl_pct:.1f}%\n"
+    f"{_SEP}\n"
+    "⚠️ 자동 손절 실행됨"
+)
+_DAILY_TMPL = (
+    "📊 일일 리포트 ({date})\n"
+    f"{_SEP}\n"
+    "총 매매: {total_trades}건\n"
+    "총 손익: ₩{total_pnl:+,.0f}\n"
+    "승률: {win_rate:.1f}%\n"
+    f"{_SEP}"
+)
+_DAILY_DETAIL_TMPL = "\n  {ticker}: {pnl_pct:+.1f}%"
 
 
 class TelegramNotifier:
@@ -21,112 +88,92 @@ class TelegramNotifier:
 
     def __init__(self):
         if not USE_STUB:
-            from telegram import Bot
-            self.bot = Bot(token=TELEGRAM_BOT_TOKEN)
             self.chat_id = TELEGRAM_CHAT_ID
+            # 인스턴스 수명 동안 keep-alive 커넥션 재사용 (메시지마다 TLS 핸드셰이크 방지)
+            self._session = requests.Session()
+            self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
         else:
-            self.bot = None
             self.chat_id = None
+            self._session = None
             logger.warning("⚠️ Telegram 토큰 없음 — stub 모드 (로그만 출력)")
 
-    async def _send(self, text: str):
-        """메시지 전송 (stub이면 로그만)"""
+    def send_sync(self, text: str, max_attempts: int = 3):
+        """메시지 전송 (stub이면 로그만). 429 응답은 retry_after 만큼 대기 후 재시도"""
         if USE_STUB:
             logger.info(f"[TELEGRAM STUB]\n{text}")
             return
-        try:
-            await self.bot.send_message(chat_id=self.chat_id, text=text, parse_mode="HTML")
-        except Exception as e:
-            logger.error(f"텔레그램 전송 실패: {e}")
-
-    def send_sync(self, text: str):
-        """동기 전송 (asyncio 없는 환경용)"""
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                loop.create_task(self._send(text))
-            else:
-                loop.run_until_complete(self._send(text))
-        except RuntimeError:
-            asyncio.run(self._send(text))
+        payload = {"chat_id": self.chat_id, "text": text, "parse_mode": "HTML"}
+        if orjson:
+            body = {"data": orjson.dumps(payload), "headers": _JSON_HEADERS}
+        else:
+            body = {"json": payload}
+        for _ in range(max_attempts):
+            try:
+                resp = self._session.post(SEND_MESSAGE_URL, timeout=10, **body)
+            except requests.RequestException as e:
+                # 예외 메시지에 토큰 포함 URL이 들어가므로 타입만 기록
+                logger.error(f"텔레그램 전송 실패: {type(e).__name__}")
+                return
+            if resp.status_code == 429:
+                try:
+                    retry_after = resp.json().get("parameters", {}).get("retry_after", 1)
+                except ValueError:
+                    retry_after = 1
+                logger.warning(f"텔레그램 429 — {retry_after}초 후 재시도")
+                time.sleep(retry_after)
+                continue
+            if resp.status_code != 200:
+                logger.error(f"텔레그램 전송 실패: {resp.status_code} {resp.text}")
+            return
+        logger.error("텔레그램 전송 실패: 429 재시도 초과")
 
     # ─── 알림 템플릿 ─────────────────────────────────────
     def notify_discovery(self, data: dict):
         """종목 발굴 알림"""
-        text = (
-            "🔍 종목 발굴\n"
-            "━━━━━━━━━━━━━━\n"
-            f"티커: {data.get('ticker', '?')}\n"
-            f"현재가: ${data.get('price', 0):.2f}\n"
-            f"5분 변동: {data.get('change_pct', 0):+.1f}%\n"
-            f"거래량비: {data.get('volume_ratio', 0):.0f}%\n"
-            f"시총: ${data.get('market_cap', 0):,.0f}\n"
-            "━━━━━━━━━━━━━━\n"
-            f"추세: {'📈 상승' if data.get('trend_direction') == 'UP' else '📉 하락' if data.get('trend_direction') == 'DOWN' else '➡️ 횡보'}"
-            f" (신뢰도 {data.get('confidence', 0):.0f}%)"
+        text = _DISCOVERY_TMPL.format(
+            ticker=data.get('ticker', '?'),
+            price=data.get('price', 0),
+            change_pct=data.get('change_pct', 0),
+            volume_ratio=data.get('volume_ratio', 0),
+            market_cap=data.get('market_cap', 0),
+            trend=_TREND_LABELS.get(data.get('trend_direction'), "➡️ 횡보"),
+            confidence=data.get('confidence', 0),
         )
         self.send_sync(text)
 
     def notify_buy_complete(self, ticker: str, quantity: int, avg_price: float,
                             total_amount: float, take_profit: float, stop_loss: float):
         """매수 완료 알림"""
-        text = (
-            "✅ 매수 완료\n"
-            "━━━━━━━━━━━━━━\n"
-            f"티커: {ticker}\n"
-            f"매수수량: {quantity}주 (10분할 완료)\n"
-            f"평균매입가: ${avg_price:.2f}\n"
-            f"총매수금액: ₩{total_amount:,.0f}\n"
-            "━━━━━━━━━━━━━━\n"
-            f"목표가(+30%): ${take_profit:.2f}\n"
-            f"손절가(-15%): ${stop_loss:.2f}"
+        text = _BUY_TMPL.format(
+            ticker=ticker, quantity=quantity, avg_price=avg_price,
+            total_amount=total_amount, take_profit=take_profit, stop_loss=stop_loss,
         )
         self.send_sync(text)
 
     def notify_sell(self, ticker: str, quantity: int, sell_price: float,
                     pnl_pct: float, pnl_amount: float, reason: str):
         """매도 알림"""
-        emoji = "💰" if pnl_pct > 0 else "📉"
-        text = (
-            f"{emoji} 매도 실행\n"
-            "━━━━━━━━━━━━━━\n"
-            f"티커: {ticker}\n"
-            f"매도수량: {quantity}주 (일괄)\n"
-            f"매도가: ${sell_price:.2f}\n"
-            f"수익률: {pnl_pct:+.1f}%\n"
-            f"실현손익: ₩{pnl_amount:+,.0f}\n"
-            "━━━━━━━━━━━━━━\n"
-            f"사유: {reason}"
+        text = _SELL_TMPL.format(
+            emoji="💰" if pnl_pct > 0 else "📉",
+            ticker=ticker, quantity=quantity, sell_price=sell_price,
+            pnl_pct=pnl_pct, pnl_amount=pnl_amount, reason=reason,
         )
         self.send_sync(text)
 
     def notify_stop_loss(self, ticker: str, quantity: int, price: float, pnl_pct: float):
         """손절 긴급 알림"""
-        text = (
-            "🚨 긴급 손절\n"
-            "━━━━━━━━━━━━━━\n"
-            f"티커: {ticker}\n"
-            f"수량: {quantity}주\n"
-            f"손절가: ${price:.2f}\n"
-            f"손실률: {pnl_pct:.1f}%\n"
-            "━━━━━━━━━━━━━━\n"
-            "⚠️ 자동 손절 실행됨"
-        )
+        text = _STOP_LOSS_TMPL.format(ticker=ticker, quantity=quantity, price=price, pnl_pct=pnl_pct)
         self.send_sync(text)
 
     def notify_daily_report(self, date: str, total_trades: int, total_pnl: float,
                             win_rate: float, details: Optional[dict] = None):
         """일일 리포트"""
-        text = (
-            f"📊 일일 리포트 ({date})\n"
-            "━━━━━━━━━━━━━━\n"
-            f"총 매매: {total_trades}건\n"
-            f"총 손익: ₩{total_pnl:+,.0f}\n"
-            f"승률: {win_rate:.1f}%\n"
-            "━━━━━━━━━━━━━━"
+        text = _DAILY_TMPL.format(
+            date=date, total_trades=total_trades, total_pnl=total_pnl, win_rate=win_rate,
         )
         if details:
-            for ticker, d in details.items():
-                text += f"\n  {ticker}: {d.get('pnl_pct', 0):+.1f}%"
+            text += "".join(
+                _DAILY_DETAIL_TMPL.format(ticker=ticker, pnl_pct=d.get('pnl_pct', 0))
+                for ticker, d in details.items()
+            )
         self.send_sync(text)
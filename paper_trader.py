@@ -6,15 +6,57 @@ import os
 import json
 import time
 import logging
+import tempfile
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from utils.fx_rate import get_usd_krw
 
 logger = logging.getLogger("paper_trader")
 
 DATA_DIR = Path(os.path.dirname(__file__)) / "data"
 PORTFOLIO_FILE = DATA_DIR / "paper_portfolio.json"
+TRADE_LOG_FILE = DATA_DIR / "paper_trades.jsonl"
+SNAPSHOT_INTERVAL = 5.0  # 포트폴리오 스냅샷 최소 간격 (초)
+RECENT_TRADES = 100  # 메모리에 유지(재시작 시 복원)할 최근 거래 수
+
+
+def _dumps(obj) -> bytes:
+    """compact JSON(UTF-8 bytes) — orjson 있으면 사용"""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _tail_lines(path: Path, n: int, block: int = 64 * 1024) -> list[bytes]:
+    """파일 끝에서부터 block 단위로 읽어 마지막 n줄 반환 (전체 파일 스트리밍 없음)"""
+    with open(path, 'rb', buffering=0) as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        chunks = []
+        newlines = 0
+        while pos > 0 and newlines <= n:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    return b"".join(reversed(chunks)).splitlines()[-n:]
+
+
 SLIPPAGE = 0.005  # 0.5%
 COMMISSION_PCT = 0.001  # 0.1%
 
@@ -23,9 +65,22 @@ class PaperTrader:
     def __init__(self, initial_capital=1_000_000):
         self.initial_capital = initial_capital
         self.cash = initial_capital
-        self.positions = {}  # {ticker: {shares, avg_price, buy_time, quantity}}
-        self.trades = []  # 거래 이력
+        # 포지션은 SoA 레이아웃 — 종목별 값을 병렬 배열로 보관, _idx로 위치 조회
+        self._tickers: list[str] = []
+        self._buy_time: list[str] = []
+        self._shares = np.empty(0, dtype=np.float64)
+        self._avg_price = np.empty(0, dtype=np.float64)
+        self._idx: dict[str, int] = {}
+        self.trades = deque(maxlen=RECENT_TRADES)  # 최근 거래 이력 (전체는 거래 로그 파일)
+        self.trade_count = 0
+        self._last_snapshot = 0.0
+        self._dirty = False
+        self._defer_depth = 0  # with 블록 중첩 깊이 — 0보다 크면 스냅샷 보류
+        self._log = None
         self.load_state()
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        # 거래 로그는 append-only — 한 번 열어두고 거래당 write 1회
+        self._log = open(TRADE_LOG_FILE, 'ab', buffering=0)
 
     def buy(self, ticker: str, price: float, amount: float, daily_volume: int = 0) -> dict | None:
         """
@@ -61,19 +116,8 @@ class PaperTrader:
                     return None
         self.cash -= total_cost
 
-        if ticker in self.positions:
-            pos = self.positions[ticker]
-            total_shares = pos['shares'] + shares
-            pos['avg_price'] = (pos['avg_price'] * pos['shares'] + buy_price * shares) / total_shares
-            pos['shares'] = total_shares
-            pos['quantity'] = int(total_shares)
-        else:
-            self.positions[ticker] = {
-                'shares': shares,
-                'avg_price': buy_price,
-                'buy_time': datetime.now().isoformat(),
-                'quantity': int(shares),
-            }
+        now = datetime.now().isoformat()
+        self._add_shares(ticker, shares, buy_price, now)
 
         trade = {
             'side': 'BUY',
@@ -82,10 +126,9 @@ class PaperTrader:
             'shares': round(shares, 4),
             'amount': round(amount),
             'commission': round(commission, 2),
-            'time': datetime.now().isoformat(),
+            'time': now,
         }
-        self.trades.append(trade)
-        self.save_state()
+        self._record(trade)
 
         logger.info(f"[가상] ✅ 매수 {ticker}: ${buy_price:.2f} x {shares:.2f}주 = ₩{amount:,.0f}")
         return {
@@ -137,19 +180,8 @@ class PaperTrader:
         avg_price = (total_cost / usd_krw_avg) / total_shares
         commission_total = total_cost * COMMISSION_PCT
 
-        if ticker in self.positions:
-            pos = self.positions[ticker]
-            all_shares = pos['shares'] + total_shares
-            pos['avg_price'] = (pos['avg_price'] * pos['shares'] + avg_price * total_shares) / all_shares
-            pos['shares'] = all_shares
-            pos['quantity'] = int(all_shares)
-        else:
-            self.positions[ticker] = {
-                'shares': total_shares,
-                'avg_price': avg_price,
-                'buy_time': datetime.now().isoformat(),
-                'quantity': int(total_shares),
-            }
+        now = datetime.now().isoformat()
+        self._add_shares(ticker, total_shares, avg_price, now)
 
         trade = {
             'side': 'BUY_SPLIT',
@@ -159,10 +191,9 @@ class PaperTrader:
             'amount': round(total_cost),
             'commission': round(commission_total, 2),
             'fills': filled,
-            'time': datetime.now().isoformat(),
+            'time': now,
         }
-        self.trades.append(trade)
-        self.save_state()
+        self._record(trade)
 
         logger.info(
             f"[가상] ✅ 10분할 매수 {ticker}: 평균${avg_price:.2f} x {total_shares:.2f}주 "
@@ -179,21 +210,23 @@ class PaperTrader:
 
     def partial_sell(self, ticker: str, price: float, ratio: float = 0.5) -> dict | None:
         """가상 부분 매도 (ratio만큼 물량 매도)"""
-        if ticker not in self.positions:
+        i = self._idx.get(ticker)
+        if i is None:
             logger.warning(f"[가상] 부분 매도 실패: {ticker} 보유 없음")
             return None
 
-        pos = self.positions[ticker]
-        sell_shares = pos['shares'] * ratio
+        avg_price = float(self._avg_price[i])
+        sell_shares = float(self._shares[i]) * ratio
         sell_price = price * (1 - SLIPPAGE)
         proceeds = sell_shares * sell_price
         commission = proceeds * COMMISSION_PCT
 
-        pnl_pct = (sell_price / pos['avg_price'] - 1) * 100
-        pnl_krw = proceeds - (sell_shares * pos['avg_price']) - commission
+        pnl_pct = (sell_price / avg_price - 1) * 100
+        pnl_krw = proceeds - (sell_shares * avg_price) - commission
 
         self.cash += proceeds - commission
-        pos['shares'] -= sell_shares
+        self._shares[i] -= sell_shares
+        now = datetime.now().isoformat()
 
         trade = {
             'side': 'PARTIAL_SELL',
@@ -204,10 +237,9 @@ class PaperTrader:
             'commission': round(commission, 2),
             'pnl_pct': round(pnl_pct, 2),
             'pnl_krw': round(pnl_krw),
-            'time': datetime.now().isoformat(),
+            'time': now,
         }
-        self.trades.append(trade)
-        self.save_state()
+        self._record(trade)
 
         logger.info(f"[가상] 💰 1차 익절 {ticker}: ${sell_price:.2f} ({pnl_pct:+.1f}%) {ratio*100:.0f}% 물량 ₩{pnl_krw:+,.0f}")
         return {
@@ -221,21 +253,23 @@ class PaperTrader:
 
     def sell(self, ticker: str, price: float) -> dict | None:
         """가상 매도"""
-        if ticker not in self.positions:
+        i = self._idx.get(ticker)
+        if i is None:
             logger.warning(f"[가상] 매도 실패: {ticker} 보유 없음")
             return None
 
-        pos = self.positions[ticker]
+        avg_price = float(self._avg_price[i])
         sell_price = price * (1 - SLIPPAGE)
-        shares = pos['shares']
+        shares = float(self._shares[i])
         proceeds = shares * sell_price
         commission = proceeds * COMMISSION_PCT
 
-        pnl_pct = (sell_price / pos['avg_price'] - 1) * 100
-        pnl_krw = proceeds - (shares * pos['avg_price']) - commission
+        pnl_pct = (sell_price / avg_price - 1) * 100
+        pnl_krw = proceeds - (shares * avg_price) - commission
 
         self.cash += proceeds - commission
-        del self.positions[ticker]
+        self._remove(ticker)
+        now = datetime.now().isoformat()
 
         trade = {
             'side': 'SELL',
@@ -246,10 +280,9 @@ class PaperTrader:
             'commission': round(commission, 2),
             'pnl_pct': round(pnl_pct, 2),
             'pnl_krw': round(pnl_krw),
-            'time': datetime.now().isoformat(),
+            'time': now,
         }
-        self.trades.append(trade)
-        self.save_state()
+        self._record(trade)
 
         emoji = '💰' if pnl_pct > 0 else '🚨'
         logger.info(f"[가상] {emoji} 매도 {ticker}: ${sell_price:.2f} ({pnl_pct:+.1f}%) ₩{pnl_krw:+,.0f}")
@@ -262,33 +295,106 @@ class PaperTrader:
             'pnl_krw': pnl_krw,
         }
 
+    # ─── 포지션 저장소 (SoA) ─────────────────────────────
+
+    def _add_shares(self, ticker: str, shares: float, price: float, now: str):
+        """신규 편입 또는 기존 포지션에 가중평균 단가로 추가"""
+        i = self._idx.get(ticker)
+        if i is not None:
+            total_shares = self._shares[i] + shares
+            self._avg_price[i] = (self._avg_price[i] * self._shares[i] + price * shares) / total_shares
+            self._shares[i] = total_shares
+            return
+        self._append(ticker, shares, price, now)
+
+    def _append(self, ticker: str, shares: float, avg_price: float, buy_time: str):
+        n = len(self._tickers)
+        if n == len(self._shares):
+            # 용량 2배 확장 — 분할 상환 O(1) append
+            cap = max(8, n * 2)
+            self._shares = np.resize(self._shares, cap)
+            self._avg_price = np.resize(self._avg_price, cap)
+        self._shares[n] = shares
+        self._avg_price[n] = avg_price
+        self._tickers.append(ticker)
+        self._buy_time.append(buy_time)
+        self._idx[ticker] = n
+
+    def _remove(self, ticker: str):
+        """제거 후 뒤쪽 원소를 한 칸씩 당김 — 편입 순서(보고서 표시 순서) 유지"""
+        i = self._idx.pop(ticker)
+        n = len(self._tickers)
+        self._shares[i:n - 1] = self._shares[i + 1:n]
+        self._avg_price[i:n - 1] = self._avg_price[i + 1:n]
+        del self._tickers[i]
+        del self._buy_time[i]
+        for j in range(i, n - 1):
+            self._idx[self._tickers[j]] = j
+
+    def _load_positions(self, positions: dict):
+        self._tickers, self._buy_time, self._idx = [], [], {}
+        self._shares = np.empty(0, dtype=np.float64)
+        self._avg_price = np.empty(0, dtype=np.float64)
+        for ticker, pos in positions.items():
+            self._append(ticker, pos['shares'], pos['avg_price'],
+                         pos.get('buy_time') or datetime.now().isoformat())
+
+    @property
+    def positions(self) -> dict:
+        """{ticker: {shares, avg_price, buy_time, quantity}} 뷰 (호출 시 생성)"""
+        return {
+            t: {
+                'shares': float(self._shares[i]),
+                'avg_price': float(self._avg_price[i]),
+                'buy_time': self._buy_time[i],
+                'quantity': int(self._shares[i]),
+            }
+            for i, t in enumerate(self._tickers)
+        }
+
+    def has_open_positions(self) -> bool:
+        return bool(self._tickers)
+
     def get_balance(self) -> dict:
         """KIS get_balance()와 동일한 형식 반환"""
         positions_list = []
-        for ticker, pos in self.positions.items():
+        for i, ticker in enumerate(self._tickers):
+            shares = float(self._shares[i])
+            avg_price = float(self._avg_price[i])
             positions_list.append({
                 'ticker': ticker,
-                'quantity': int(pos['shares']),
-                'avg_price': pos['avg_price'],
-                'current_price': pos['avg_price'],  # 실시간 가격은 외부에서 업데이트
-                'shares': pos['shares'],
+                'quantity': int(shares),
+                'avg_price': avg_price,
+                'current_price': avg_price,  # 실시간 가격은 외부에서 업데이트
+                'shares': shares,
             })
         return {
             'cash': self.cash,
             'positions': positions_list,
         }
 
+    def _price_vec(self, prices: dict = None) -> np.ndarray:
+        """보유 종목 순서대로 현재가 벡터 (가격 없으면 평단가)"""
+        n = len(self._tickers)
+        if not prices:
+            return self._avg_price[:n]
+        return np.fromiter(
+            (prices.get(t, self._avg_price[i]) for i, t in enumerate(self._tickers)),
+            dtype=np.float64, count=n,
+        )
+
+    def _market_value(self, price_vec: np.ndarray) -> float:
+        return self.cash + float(self._shares[:len(self._tickers)] @ price_vec)
+
     def get_portfolio_value(self, prices: dict = None) -> float:
         """총 평가액 (prices: {ticker: current_price})"""
-        total = self.cash
-        for ticker, pos in self.positions.items():
-            p = (prices or {}).get(ticker, pos['avg_price'])
-            total += pos['shares'] * p
-        return total
+        return self._market_value(self._price_vec(prices))
 
     def get_status_text(self, prices: dict = None) -> str:
         """텔레그램 상태 보고용 텍스트"""
-        total_value = self.get_portfolio_value(prices)
+        # 가격 벡터 1회 구성 → 평가액/종목별 수익률 모두 배열 연산으로 계산
+        price_vec = self._price_vec(prices)
+        total_value = self._market_value(price_vec)
         pnl = total_value - self.initial_capital
         pnl_pct = (total_value / self.initial_capital - 1) * 100
 
@@ -299,44 +405,170 @@ class PaperTrader:
             f"현금: ₩{self.cash:,.0f}",
             f"수익: ₩{pnl:+,.0f}",
         ]
-        if self.positions:
-            lines.append(f"보유 {len(self.positions)}종목:")
-            for ticker, pos in self.positions.items():
-                p = (prices or {}).get(ticker, pos['avg_price'])
-                pos_pnl = (p / pos['avg_price'] - 1) * 100
-                lines.append(f"  {ticker}: ${p:.2f} ({pos_pnl:+.1f}%)")
-        lines.append(f"총 거래: {len(self.trades)}건")
+        if self._tickers:
+            lines.append(f"보유 {len(self._tickers)}종목:")
+            pos_pnl = (price_vec / self._avg_price[:len(self._tickers)] - 1) * 100
+            lines.extend(
+                f"  {t}: ${p:.2f} ({q:+.1f}%)"
+                for t, p, q in zip(self._tickers, price_vec.tolist(), pos_pnl.tolist())
+            )
+        lines.append(f"총 거래: {self.trade_count}건")
         return "\n".join(lines)
 
-    def save_state(self):
-        """JSON 저장"""
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
+    def _record(self, trade: dict):
+        """
+        거래 1건을 로그에 추가하고 스냅샷은 디바운스
+        로그 줄에는 체결 직후의 현금/해당 종목 포지션을 함께 기록 — 스냅샷 이후 거래는 재시작 시 재생
+        """
+        self.trades.append(trade)
+        self.trade_count += 1
+        ticker = trade['ticker']
+        i = self._idx.get(ticker)
+        entry = dict(trade, cash_after=self.cash, position_after=None if i is None else [
+            float(self._shares[i]), float(self._avg_price[i]), self._buy_time[i]])
+        try:
+            self._log.write(_dumps(entry) + b"\n")
+        except Exception as e:
+            logger.error(f"거래 로그 기록 실패: {e}")
+        self._dirty = True
+        self._maybe_snapshot(trade['time'])
+
+    def _maybe_snapshot(self, now: str = None):
+        """마지막 스냅샷 후 SNAPSHOT_INTERVAL이 지났을 때만 저장 (with 블록 안에서는 보류)"""
+        if self._defer_depth == 0 and time.monotonic() - self._last_snapshot > SNAPSHOT_INTERVAL:
+            self.save_state(now)
+
+    def save_state(self, now: str = None):
+        """
+        포트폴리오 스냅샷 저장 (현금/포지션만, tempfile + os.replace로 원자적 교체)
+        now: 호출 측에서 이미 만든 ISO 시각 문자열 (없으면 새로 생성)
+        """
         state = {
             'cash': self.cash,
             'initial_capital': self.initial_capital,
             'positions': self.positions,
-            'trades': self.trades[-100:],  # 최근 100건만
-            'updated_at': datetime.now().isoformat(),
+            'updated_at': now or datetime.now().isoformat(),
+            # 이 스냅샷에 반영된 거래 로그 위치 — 이후 줄은 load_state에서 재생
+            'log_offset': self._log.tell() if self._log else 0,
         }
+        tmp_path = None
         try:
-            with open(PORTFOLIO_FILE, 'w') as f:
-                json.dump(state, f, indent=2, ensure_ascii=False)
+            DATA_DIR.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile('wb', dir=DATA_DIR, suffix='.tmp', delete=False) as f:
+                tmp_path = f.name
+                f.write(_dumps(state))
+                # rename 전에 디스크 반영 — 전원 단절 시 빈 파일로 교체되는 것 방지
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, PORTFOLIO_FILE)
+            self._last_snapshot = time.monotonic()
+            self._dirty = False
         except Exception as e:
             logger.error(f"포트폴리오 저장 실패: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def flush(self):
+        """미저장 변경이 있을 때만 스냅샷 저장"""
+        if self._dirty:
+            self.save_state()
+
+    def __enter__(self):
+        """
+        with trader: ... — 블록 안의 매매는 스냅샷 없이 누적, 종료 시 1회 저장
+        (거래 로그 append는 건별 그대로 — 블록 중 비정상 종료 시 load_state가 로그 재생으로 복구)
+        """
+        self._defer_depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._defer_depth -= 1
+        if self._defer_depth == 0:
+            self.flush()
+        return False
+
+    def close(self):
+        """종료 시 미저장 스냅샷 반영 후 거래 로그 닫기"""
+        self.flush()
+        self._log.close()
 
     def load_state(self):
-        """JSON 로드 (없으면 초기값)"""
+        """스냅샷 로드 (없으면 초기값) 후 스냅샷 이후 거래 로그 재생"""
+        log_offset = 0
         try:
-            if PORTFOLIO_FILE.exists():
-                with open(PORTFOLIO_FILE) as f:
-                    state = json.load(f)
-                self.cash = state.get('cash', self.initial_capital)
-                self.initial_capital = state.get('initial_capital', self.initial_capital)
-                self.positions = state.get('positions', {})
-                self.trades = state.get('trades', [])
-                logger.info(f"[가상] 포트폴리오 복원: ₩{self.cash:,.0f}, {len(self.positions)}종목")
+            state = _loads(PORTFOLIO_FILE.read_bytes())
+            # log_offset 없는 구버전 스냅샷은 로그 재생 생략
+            log_offset = state.get('log_offset')
+            self.cash = state.get('cash', self.initial_capital)
+            self.initial_capital = state.get('initial_capital', self.initial_capital)
+            self._load_positions(state.get('positions', {}))
+            # 구버전 스냅샷은 trades를 함께 저장했음
+            self.trades = deque(state.get('trades', []), maxlen=RECENT_TRADES)
+            logger.info(f"[가상] 포트폴리오 복원: ₩{self.cash:,.0f}, {len(self._tickers)}종목")
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logger.warning(f"포트폴리오 로드 실패 (초기값 사용): {e}")
+            log_offset = None
+        if log_offset is not None:
+            try:
+                self._replay_log(log_offset)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"거래 로그 재생 실패: {e}")
+        try:
+            recent = _tail_lines(TRADE_LOG_FILE, RECENT_TRADES)
+            self.trades = deque((self._strip_state(_loads(line)) for line in recent if line.strip()),
+                                maxlen=RECENT_TRADES)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"거래 로그 로드 실패: {e}")
+        self.trade_count = len(self.trades)
+
+    def _replay_log(self, offset: int):
+        """offset 이후 거래 로그 줄의 체결 후 상태(cash_after/position_after)를 순서대로 반영"""
+        with open(TRADE_LOG_FILE, 'rb') as f:
+            if f.seek(0, os.SEEK_END) < offset:
+                logger.warning("[가상] 거래 로그가 스냅샷보다 짧음 — 재생 생략")
+                return
+            f.seek(offset)
+            data = f.read()
+        replayed = 0
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = _loads(line)
+            except ValueError:
+                # 기록 도중 종료된 마지막 줄
+                break
+            if 'cash_after' not in entry:
+                continue
+            self.cash = entry['cash_after']
+            ticker = entry['ticker']
+            pos = entry['position_after']
+            i = self._idx.get(ticker)
+            if pos is None:
+                if i is not None:
+                    self._remove(ticker)
+            elif i is None:
+                self._append(ticker, *pos)
+            else:
+                self._shares[i], self._avg_price[i] = pos[0], pos[1]
+                self._buy_time[i] = pos[2]
+            replayed += 1
+        if replayed:
+            self._dirty = True
+            logger.info(f"[가상] 스냅샷 이후 거래 {replayed}건 재생: ₩{self.cash:,.0f}, {len(self._tickers)}종목")
+
+    @staticmethod
+    def _strip_state(entry: dict) -> dict:
+        """로그 줄에서 재생용 필드를 떼어낸 거래 기록"""
+        entry.pop('cash_after', None)
+        entry.pop('position_after', None)
+        return entry
 
     def get_telegram_backup_text(self) -> str:
         """텔레그램 백업용 JSON 텍스트"""
@@ -344,4 +576,5 @@ class PaperTrader:
             'cash': round(self.cash),
             'positions': {k: {'shares': round(v['shares'], 4), 'avg_price': round(v['avg_price'], 4)} for k, v in self.positions.items()},
         }
-        return f"📦 Paper Portfolio Backup:\n```\n{json.dumps(state, indent=2)}\n```"
+        # 들여쓰기 없이 전송 — 텔레그램 4096자 제한 대비
+        return f"📦 Paper Portfolio Backup:\n```\n{_dumps(state).decode()}\n```"
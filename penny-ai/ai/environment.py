@@ -44,9 +44,14 @@ class PennyStockEnv(gym.Env):
         self.window_size = window_size
         self.n_steps = len(self.df)
 
+        # 스텝마다 DataFrame 인덱싱 대신 연속 float32 배열에서 슬라이스
+        self._feat = np.ascontiguousarray(self.df[FEATURE_COLS].to_numpy(dtype=np.float32))
+        self._close = self.df['close'].to_numpy(dtype=np.float64)
+
         # 관측 공간: window_size × feature_cols + 포지션 정보 3개
         n_features = len(FEATURE_COLS)
         obs_dim = window_size * n_features + 3
+        self._obs_dim = obs_dim
         self.observation_space = spaces.Box(
             low=-np.inf, high=np.inf, shape=(obs_dim,), dtype=np.float32
         )
@@ -65,24 +70,25 @@ class PennyStockEnv(gym.Env):
         self.trade_count = 0
 
     def _get_obs(self):
-        window = self.df[FEATURE_COLS].iloc[
-            self.current_step - self.window_size: self.current_step
-        ].values.astype(np.float32)
-
-        current_price = self.df['close'].iloc[self.current_step]
+        current_price = self._close[self.current_step]
         position_flag = float(self.shares > 0)
         avg_price_ratio = self.avg_buy_price / (current_price + 1e-9) if self.shares > 0 else 1.0
         unrealized_pnl = (current_price - self.avg_buy_price) / (self.avg_buy_price + 1e-9) if self.shares > 0 else 0.0
 
-        extra = np.array([position_flag, avg_price_ratio, unrealized_pnl], dtype=np.float32)
-        return np.concatenate([window.flatten(), extra])
+        # 관측 배열 1회 할당 — 윈도우는 _feat 뷰를 그대로 복사
+        obs = np.empty(self._obs_dim, dtype=np.float32)
+        obs[:-3] = self._feat[self.current_step - self.window_size: self.current_step].ravel()
+        obs[-3] = position_flag
+        obs[-2] = avg_price_ratio
+        obs[-1] = unrealized_pnl
+        return obs
 
     def _portfolio_value(self):
-        price = self.df['close'].iloc[self.current_step]
+        price = self._close[self.current_step]
         return self.cash + self.shares * price
 
     def step(self, action: int):
-        price = self.df['close'].iloc[self.current_step]
+        price = self._close[self.current_step]
         reward = 0.0
         info = {}
 
@@ -136,6 +142,6 @@ class PennyStockEnv(gym.Env):
         return self._get_obs(), {}
 
     def render(self):
-        price = self.df['close'].iloc[self.current_step]
+        price = self._close[self.current_step]
         pv = self._portfolio_value()
         print(f"Step {self.current_step} | Price: {price:.4f} | Portfolio: {pv:.2f} | Shares: {self.shares:.2f}")
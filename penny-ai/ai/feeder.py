@@ -6,6 +6,7 @@ Transformer 기반 패턴 인식 모듈 (Feeder)
 
 import os
 import io
+import math
 import logging
 from typing import Optional, Tuple
 import numpy as np
@@ -46,15 +47,16 @@ class PositionalEncoding(nn.Module):
         self.dropout = nn.Dropout(p=dropout)
 
         pe = torch.zeros(max_len, d_model)
-        position = torch.arange(0, max_len, dtype=torch.float).unsqueeze(1)
-        div_term = torch.exp(torch.arange(0, d_model, 2).float() * (-np.log(10000.0) / d_model))
+        position = torch.arange(0, max_len, dtype=torch.float32).unsqueeze(1)
+        div_term = torch.exp(torch.arange(0, d_model, 2, dtype=torch.float32) * (-math.log(10000.0) / d_model))
         pe[:, 0::2] = torch.sin(position * div_term)
         pe[:, 1::2] = torch.cos(position * div_term)
         pe = pe.unsqueeze(0)  # (1, max_len, d_model)
         self.register_buffer("pe", pe)
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
-        x = x + self.pe[:, :x.size(1), :]
+        # autocast(bf16/fp16) 입력을 fp32로 승격시키지 않도록 입력 dtype에 맞춤
+        x = x + self.pe[:, :x.size(1), :].to(dtype=x.dtype)
         return self.dropout(x)
 
 
@@ -110,10 +112,10 @@ class PennyFeeder(nn.Module):
             nn.GELU(),
             nn.Dropout(dropout),
             nn.Linear(d_model // 4, 1),
-            nn.Sigmoid(),
-        )
+        )  # 로짓 출력 — sigmoid는 손실(BCEWithLogits)/predict에서 적용
 
         self._init_weights()
+        self._infer_buf: Optional[torch.Tensor] = None  # predict() 입력 버퍼
 
     def _init_weights(self):
         for p in self.parameters():
@@ -123,7 +125,7 @@ class PennyFeeder(nn.Module):
     def forward(self, x: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
         """
         x: (batch, window_size, n_features)
-        return: case_logits (batch, n_cases), surge_prob (batch, 1)
+        return: case_logits (batch, n_cases), surge_logit (batch, 1)
         """
         # 입력 프로젝션
         x = self.input_projection(x)  # (batch, window, d_model)
@@ -137,9 +139,9 @@ class PennyFeeder(nn.Module):
 
         # 출력
         case_logits = self.case_head(cls_repr)    # (batch, n_cases)
-        surge_prob = self.surge_head(cls_repr)    # (batch, 1)
+        surge_logit = self.surge_head(cls_repr)   # (batch, 1)
 
-        return case_logits, surge_prob
+        return case_logits, surge_logit
 
     def predict(self, x: np.ndarray) -> Tuple[np.ndarray, float]:
         """
@@ -147,12 +149,18 @@ class PennyFeeder(nn.Module):
         x: (window_size, n_features)
         return: case_probs (5,), surge_prob (float)
         """
+        x = np.asarray(x, dtype=np.float32)
         self.eval()
-        with torch.no_grad():
-            tensor = torch.FloatTensor(x).unsqueeze(0)  # (1, window, features)
-            case_logits, surge_prob = self.forward(tensor)
-            case_probs = torch.softmax(case_logits, dim=-1).squeeze(0).numpy()
-            surge = float(surge_prob.squeeze())
+        with torch.inference_mode():
+            # 입력 버퍼는 장치·shape가 같으면 재사용 (호출마다 텐서 할당 없음)
+            device = next(self.parameters()).device
+            buf = self._infer_buf
+            if buf is None or buf.device != device or buf.shape[1:] != x.shape:
+                buf = self._infer_buf = torch.empty((1, *x.shape), dtype=torch.float32, device=device)
+            buf[0].copy_(torch.from_numpy(x), non_blocking=True)
+            case_logits, surge_logit = self.forward(buf)
+            case_probs = torch.softmax(case_logits, dim=-1).squeeze(0).cpu().numpy()
+            surge = float(torch.sigmoid(surge_logit).squeeze())
         return case_probs, surge
 
 
@@ -164,84 +172,149 @@ class FeederTrainer:
         model: PennyFeeder,
         lr: float = 1e-4,
         device: str = None,
+        compile_model: Optional[bool] = None,
     ):
+        """
+        compile_model: torch.compile 적용 여부 (None이면 CUDA + torch 2.x일 때만)
+        """
         self.model = model
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         self.model = self.model.to(self.device)
 
+        # 학습/평가 forward만 컴파일본 사용 — state_dict 키(_orig_mod.)가 바뀌지 않도록 self.model은 원본 유지
+        if compile_model is None:
+            compile_model = str(self.device).startswith("cuda")
+        self._forward = self.model
+        if compile_model and hasattr(torch, "compile"):
+            self._forward = torch.compile(self.model)
+
         self.optimizer = optim.AdamW(model.parameters(), lr=lr, weight_decay=1e-4)
         self.scheduler = optim.lr_scheduler.CosineAnnealingLR(
             self.optimizer, T_max=100, eta_min=1e-6
         )
         self.case_criterion = nn.CrossEntropyLoss()
-        self.surge_criterion = nn.BCELoss()
+        self.surge_criterion = nn.BCEWithLogitsLoss()
+
+        # CUDA 혼합정밀도: bf16 지원 GPU는 bf16(스케일러 불필요), 그 외 fp16 + GradScaler
+        self._use_amp = str(self.device).startswith("cuda")
+        self._amp_dtype = (
+            torch.bfloat16 if self._use_amp and torch.cuda.is_bf16_supported() else torch.float16
+        )
+        self.scaler = torch.amp.GradScaler(
+            "cuda",
+            enabled=self._use_amp and self._amp_dtype == torch.float16
+        )
+
+    def make_loader(self, dataset: Dataset, batch_size: int = 64, shuffle: bool = False,
+                    num_workers: Optional[int] = None) -> DataLoader:
+        """
+        학습 장치에 맞춘 DataLoader 생성
+        CUDA면 pinned memory + 워커 프로세스 → non_blocking 전송이 이전 배치 연산과 겹침
+        """
+        on_cuda = str(self.device).startswith("cuda")
+        if num_workers is None:
+            num_workers = max(1, (os.cpu_count() or 2) // 2) if on_cuda else 0
+        return DataLoader(
+            dataset,
+            batch_size=batch_size,
+            shuffle=shuffle,
+            num_workers=num_workers,
+            pin_memory=on_cuda,
+            persistent_workers=num_workers > 0,
+        )
+
+    def _autocast(self):
+        return torch.autocast(device_type="cuda", dtype=self._amp_dtype, enabled=self._use_amp)
 
     def train_epoch(self, dataloader: DataLoader) -> dict:
         self.model.train()
-        total_loss = 0.0
-        total_case_loss = 0.0
-        total_surge_loss = 0.0
-        correct = 0
+        # 루프 안에서 반복 조회되는 속성은 지역 변수로 고정
+        device = self.device
+        forward = self._forward
+        autocast = self._autocast
+        case_criterion = self.case_criterion
+        surge_criterion = self.surge_criterion
+        optimizer = self.optimizer
+        scaler = self.scaler
+        params = list(self.model.parameters())
+
+        # 배치별 .item() 동기화 대신 장치 텐서에 누적 → 에폭 끝에 1회 동기화
+        loss_sums = torch.zeros(3, device=device)  # loss, case_loss, surge_loss
+        correct = torch.zeros((), dtype=torch.long, device=device)
         total = 0
+        n_batches = 0
 
         for sequences, case_labels, surge_labels in dataloader:
-            sequences = sequences.to(self.device)
-            case_labels = case_labels.to(self.device)
-            surge_labels = surge_labels.to(self.device)
+            sequences = sequences.to(device, non_blocking=True)
+            case_labels = case_labels.to(device, non_blocking=True)
+            surge_labels = surge_labels.to(device, non_blocking=True)
 
-            self.optimizer.zero_grad()
-            case_logits, surge_prob = self.model(sequences)
+            optimizer.zero_grad()
+            with autocast():
+                case_logits, surge_logit = forward(sequences)
 
-            case_loss = self.case_criterion(case_logits, case_labels)
-            surge_loss = self.surge_criterion(surge_prob.squeeze(), surge_labels)
+            # 손실은 fp32로 계산
+            case_loss = case_criterion(case_logits.float(), case_labels)
+            surge_loss = surge_criterion(surge_logit.float().view(-1), surge_labels)
             loss = case_loss + 0.5 * surge_loss
 
-            loss.backward()
-            nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=1.0)
-            self.optimizer.step()
-
-            total_loss += loss.item()
-            total_case_loss += case_loss.item()
-            total_surge_loss += surge_loss.item()
+            scaler.scale(loss).backward()
+            scaler.unscale_(optimizer)
+            nn.utils.clip_grad_norm_(params, max_norm=1.0)
+            scaler.step(optimizer)
+            scaler.update()
 
             preds = case_logits.argmax(dim=-1)
-            correct += (preds == case_labels).sum().item()
+            loss_sums += torch.stack([loss.detach(), case_loss.detach(), surge_loss.detach()])
+            correct += (preds == case_labels).sum()
             total += len(case_labels)
+            n_batches += 1
 
         self.scheduler.step()
 
+        total_loss, total_case_loss, total_surge_loss = loss_sums.tolist()
+        correct = correct.item()
         return {
-            "loss": total_loss / len(dataloader),
-            "case_loss": total_case_loss / len(dataloader),
-            "surge_loss": total_surge_loss / len(dataloader),
+            "loss": total_loss / n_batches,
+            "case_loss": total_case_loss / n_batches,
+            "surge_loss": total_surge_loss / n_batches,
             "accuracy": correct / total if total > 0 else 0,
         }
 
     def evaluate(self, dataloader: DataLoader) -> dict:
         self.model.eval()
-        total_loss = 0.0
-        correct = 0
+        device = self.device
+        forward = self._forward
+        autocast = self._autocast
+        case_criterion = self.case_criterion
+        surge_criterion = self.surge_criterion
+
+        total_loss = torch.zeros((), device=device)
+        correct = torch.zeros((), dtype=torch.long, device=device)
         total = 0
+        n_batches = 0
 
         with torch.no_grad():
             for sequences, case_labels, surge_labels in dataloader:
-                sequences = sequences.to(self.device)
-                case_labels = case_labels.to(self.device)
-                surge_labels = surge_labels.to(self.device)
-
-                case_logits, surge_prob = self.model(sequences)
-                case_loss = self.case_criterion(case_logits, case_labels)
-                surge_loss = self.surge_criterion(surge_prob.squeeze(), surge_labels)
+                sequences = sequences.to(device, non_blocking=True)
+                case_labels = case_labels.to(device, non_blocking=True)
+                surge_labels = surge_labels.to(device, non_blocking=True)
+
+                with autocast():
+                    case_logits, surge_logit = forward(sequences)
+                case_loss = case_criterion(case_logits.float(), case_labels)
+                surge_loss = surge_criterion(surge_logit.float().view(-1), surge_labels)
                 loss = case_loss + 0.5 * surge_loss
 
-                total_loss += loss.item()
+                total_loss += loss
                 preds = case_logits.argmax(dim=-1)
-                correct += (preds == case_labels).sum().item()
+                correct += (preds == case_labels).sum()
                 total += len(case_labels)
+                n_batches += 1
 
         return {
-            "loss": total_loss / len(dataloader),
-            "accuracy": correct / total if total > 0 else 0,
+            "loss": total_loss.item() / n_batches,
+            "accuracy": correct.item() / total if total > 0 else 0,
         }
 
     def train(
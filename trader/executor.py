@@ -15,7 +15,6 @@ try:
     import redis
 except ImportError:
     redis = None
-import yaml
 
 from trader.kis_client import KISClient
 from trader.market_hours import is_trading_window, is_us_market_open, minutes_until_session_end, get_all_timestamps, get_trading_date
@@ -30,8 +29,8 @@ class TradeExecutor:
     def __init__(self, redis_client, config: Optional[dict] = None):
         self.redis = redis_client
         if config is None:
-            with open("config/config.yaml", "r") as f:
-                config = yaml.safe_load(f)
+            from utils.config import load_config
+            config = load_config()
         self.config = config
         self.trading_cfg = config.get("trading", {})
         self.kis = KISClient()
@@ -178,6 +177,7 @@ class TradeExecutor:
         - 트레일링 비활성화 시: +30% 즉시 익절
         """
         balance = self.kis.get_balance()
+        events = []
         for pos in balance.get("positions", []):
             ticker = pos["ticker"]
             avg_price = pos["avg_price"]
@@ -193,16 +193,12 @@ class TradeExecutor:
                 logger.warning(f"🚨 {ticker} 손절선 도달 ({pnl_pct:.1f}%)")
                 self._peak_prices.pop(ticker, None)
                 self.execute_stop_loss(ticker)
-                if self.redis is not None:
-                    try:
-                        self.redis and self.redis.publish("channel:signal", json.dumps({
-                            "ticker": ticker,
-                            "signal": "STOP",
-                            "pnl_pct": round(pnl_pct, 2),
-                            "price": current_price,
-                        }))
-                    except Exception:
-                        pass
+                events.append({
+                    "ticker": ticker,
+                    "signal": "STOP",
+                    "pnl_pct": round(pnl_pct, 2),
+                    "price": current_price,
+                })
                 continue
 
             # 트레일링 스탑 로직
@@ -221,35 +217,28 @@ class TradeExecutor:
                         logger.info(f"💰 {ticker} 트레일링스탑 발동! 최고${peak:.2f} → 현재${current_price:.2f} (고점-{drop_from_peak:.1f}%) 최종수익 {final_pnl:+.1f}%")
                         self._peak_prices.pop(ticker, None)
                         self.execute_sell(ticker)
-                        if self.redis is not None:
-                            try:
-                                self.redis and self.redis.publish("channel:signal", json.dumps({
-                                    "ticker": ticker,
-                                    "signal": "TRAILING_STOP",
-                                    "pnl_pct": round(final_pnl, 2),
-                                    "peak_price": peak,
-                                    "price": current_price,
-                                    "timestamps": get_all_timestamps(),
-                                }))
-                            except Exception:
-                                pass
+                        events.append({
+                            "ticker": ticker,
+                            "signal": "TRAILING_STOP",
+                            "pnl_pct": round(final_pnl, 2),
+                            "peak_price": peak,
+                            "price": current_price,
+                            "timestamps": get_all_timestamps(),
+                        })
                         continue
 
             # 트레일링 비활성화 시: 고정 익절
             elif not self.trailing_stop and pnl_pct >= self.take_profit_pct:
                 logger.info(f"💰 {ticker} 익절선 도달 ({pnl_pct:.1f}%) — 즉시 매도")
                 self.execute_sell(ticker)
-                if self.redis is not None:
-                    try:
-                        self.redis and self.redis.publish("channel:signal", json.dumps({
-                            "ticker": ticker,
-                            "signal": "TAKE_PROFIT",
-                            "pnl_pct": round(pnl_pct, 2),
-                            "price": current_price,
-                            "timestamps": get_all_timestamps(),
-                        }))
-                    except Exception:
-                        pass
+                events.append({
+                    "ticker": ticker,
+                    "signal": "TAKE_PROFIT",
+                    "pnl_pct": round(pnl_pct, 2),
+                    "price": current_price,
+                    "timestamps": get_all_timestamps(),
+                })
+        self._publish_events(events)
 
     def force_close_all_positions(self):
         """
@@ -263,6 +252,7 @@ class TradeExecutor:
             return
 
         logger.warning(f"🚨 데이트레이딩 강제청산 시작 — {len(positions)}개 종목")
+        events = []
         for pos in positions:
             ticker = pos["ticker"]
             qty = pos.get("quantity", 0)
@@ -270,18 +260,28 @@ class TradeExecutor:
                 continue
             logger.warning(f"🚨 {ticker} 강제청산: {qty}주 시장가 매도")
             result = self.kis.sell_market(ticker, qty)
-            if result and self.redis is not None:
-                try:
-                    self.redis and self.redis.publish("channel:signal", json.dumps({
-                        "ticker": ticker,
-                        "signal": "FORCE_CLOSE",
-                        "quantity": qty,
-                        "timestamps": get_all_timestamps(),
-                    }))
-                except Exception:
-                    pass
+            if result:
+                events.append({
+                    "ticker": ticker,
+                    "signal": "FORCE_CLOSE",
+                    "quantity": qty,
+                    "timestamps": get_all_timestamps(),
+                })
+        self._publish_events(events)
         logger.warning("🚨 강제청산 완료")
 
+    def _publish_events(self, events: list[dict]):
+        """체결 이벤트를 channel:signal로 한 번에 publish (파이프라인 1회 왕복)"""
+        if not events or self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for event in events:
+                pipe.publish("channel:signal", json.dumps(event))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis publish 실패 ({len(events)}건): {e}")
+
     def should_force_close(self) -> bool:
         """세션 종료(KST 06:00) 임박 여부 확인"""
         remaining = minutes_until_session_end()
@@ -289,31 +289,31 @@ class TradeExecutor:
 
     def run_subscriber(self):
         """
-        Redis channel:signal 구독 → 매매 실행
+        Redis channel:signal 구독 → 매매 실행 (drain()으로 배치 수신)
         """
+        from utils.pubsub import drain
+
         logger.info("📡 매매 실행기 시작 — channel:signal 구독 중...")
         pubsub = self.redis.pubsub()
         pubsub.subscribe("channel:signal")
 
-        for message in pubsub.listen():
-            if message["type"] != "message":
-                continue
-
-            try:
-                data = json.loads(message["data"])
-                ticker = data.get("ticker")
-                signal = data.get("signal")
-                price = data.get("price", 0)
+        while True:
+            for message in drain(pubsub):
+                try:
+                    data = json.loads(message["data"])
+                    ticker = data.get("ticker")
+                    signal = data.get("signal")
+                    price = data.get("price", 0)
 
-                if not ticker or not signal:
-                    continue
+                    if not ticker or not signal:
+                        continue
 
-                if signal == "BUY":
-                    self.execute_buy(ticker, price)
-                elif signal == "SELL":
-                    self.execute_sell(ticker)
-                elif signal == "STOP":
-                    self.execute_stop_loss(ticker)
+                    if signal == "BUY":
+                        self.execute_buy(ticker, price)
+                    elif signal == "SELL":
+                        self.execute_sell(ticker)
+                    elif signal == "STOP":
+                        self.execute_stop_loss(ticker)
 
-            except Exception as e:
-                logger.error(f"매매 실행 오류: {e}", exc_info=True)
+                except Exception as e:
+                    logger.error(f"매매 실행 오류: {e}", exc_info=True)
@@ -229,7 +229,8 @@ class KISClient:
             return {"cash": cash_usd, "positions": positions}
         except Exception as e:
             logger.error(f"잔고 조회 실패: {e}")
-            return {"cash": 0, "positions": []}
+            # error 표시 — 캐시(PositionCache)가 빈 잔고를 정상 결과로 저장하지 않도록
+            return {"cash": 0, "positions": [], "error": True}
 
     # ─── 당일 주문 내역 조회 ─────────────────────────────────
     def get_today_orders(self) -> list[str]:
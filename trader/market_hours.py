@@ -4,7 +4,9 @@
 - US 정규장: ET 9:30~16:00
 - 장 마감 = KST 06:00 (강제청산 기준)
 """
-from datetime import datetime, time as dtime
+from datetime import datetime, time as dtime, timedelta
+from typing import NamedTuple, Optional
+
 import pytz
 
 ET = pytz.timezone("America/New_York")
@@ -40,9 +42,9 @@ def is_premarket_prep() -> bool:
     return dtime(17, 50) <= now.time() < dtime(18, 0)
 
 
-def is_scan_active() -> bool:
+def is_scan_active(now: Optional[datetime] = None) -> bool:
     """bar_scanner 동작 가능 여부 — 17:50부터 06:00까지"""
-    now = now_kst()
+    now = now or now_kst()
     hour = now.hour
     minute = now.minute
     in_window = (hour == 17 and minute >= 50) or hour >= 18 or hour < 6
@@ -54,12 +56,12 @@ def is_scan_active() -> bool:
     return True
 
 
-def is_trading_window() -> bool:
+def is_trading_window(now: Optional[datetime] = None) -> bool:
     """
     KST 18:00 ~ 익일 06:00 매매 가능 여부.
     주말(토요일 18시~월요일 06시는 미국장 안 열림) 제외.
     """
-    now = now_kst()
+    now = now or now_kst()
     hour = now.hour
 
     # KST 18:00~23:59 또는 00:00~05:59
@@ -84,15 +86,15 @@ def is_us_market_open() -> bool:
     return US_MARKET_OPEN <= now.time() < US_MARKET_CLOSE
 
 
-def minutes_until_session_end() -> float:
+def minutes_until_session_end(now: Optional[datetime] = None) -> float:
     """
     KST 06:00 (매매 세션 종료)까지 남은 분.
     매매 윈도우 밖이면 -1 반환.
     """
-    if not is_trading_window():
+    now = now or now_kst()
+    if not is_trading_window(now):
         return -1
 
-    now = now_kst()
     hour = now.hour
 
     if hour >= 18:
@@ -116,14 +118,33 @@ def get_all_timestamps() -> dict:
     }
 
 
-def get_trading_date() -> str:
+def get_trading_date(now: Optional[datetime] = None) -> str:
     """
     현재 매매일 반환 (YYYY-MM-DD).
     KST 18:00 이후면 당일, 00:00~06:00이면 전일이 매매일.
     """
-    now = now_kst()
+    now = now or now_kst()
     if now.hour < 6:
         # 자정~06시 = 전날 세션
-        from datetime import timedelta
         return (now - timedelta(days=1)).strftime("%Y-%m-%d")
     return now.strftime("%Y-%m-%d")
+
+
+class TickContext(NamedTuple):
+    """스캔 틱 1회 동안 공유하는 시각 정보 (KST now 1회 계산)"""
+    now: datetime
+    in_window: bool
+    scan_active: bool
+    trading_date: str
+    remaining_min: float
+
+
+def tick_context() -> TickContext:
+    now = now_kst()
+    return TickContext(
+        now=now,
+        in_window=is_trading_window(now),
+        scan_active=is_scan_active(now),
+        trading_date=get_trading_date(now),
+        remaining_min=minutes_until_session_end(now),
+    )
@@ -0,0 +1,33 @@
+"""
+utils/config.py
+config/config.yaml 로더 — 프로세스 전체가 공유하는 단일 캐시
+"""
+import os
+from functools import lru_cache
+from types import MappingProxyType
+
+import yaml
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "config.yaml")
+
+# libyaml C 파서 사용 가능 시 우선 (SafeLoader와 동일 규칙)
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _freeze(obj):
+    """dict → MappingProxyType, list → tuple 재귀 변환 (중첩 섹션까지 읽기 전용)"""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+@lru_cache(maxsize=1)
+def load_config() -> MappingProxyType:
+    """
+    config.yaml 1회 파싱 후 캐시 (작업 디렉터리와 무관)
+    모든 호출측이 같은 객체를 공유하므로 중첩 섹션까지 읽기 전용으로 고정
+    """
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        return _freeze(yaml.load(f, Loader=_YAML_LOADER))
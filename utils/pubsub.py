@@ -0,0 +1,28 @@
+"""
+utils/pubsub.py
+Redis PubSub 배치 수신 헬퍼
+- 첫 메시지는 블로킹 대기, 이후 도착분은 짧은 시간창 안에서 모아서 반환
+"""
+import time
+
+
+def drain(pubsub, n: int = 64, timeout: float = 0.05, block: float = 1.0) -> list:
+    """
+    PubSub에서 최대 n개 메시지를 모아 반환 (구독 확인 메시지 제외)
+
+    block: 첫 메시지 대기 시간 (초) — 유휴 시 busy loop 방지
+    timeout: 첫 메시지 이후 추가 메시지를 모으는 시간창 (초)
+    """
+    first = pubsub.get_message(ignore_subscribe_messages=True, timeout=block)
+    if first is None:
+        return []
+    out = [first]
+    deadline = time.monotonic() + timeout
+    while len(out) < n:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        msg = pubsub.get_message(ignore_subscribe_messages=True, timeout=min(remaining, 0.01))
+        if msg is not None:
+            out.append(msg)
+    return out